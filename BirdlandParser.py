@@ -4,6 +4,7 @@ import re
 import bs4
 
 from EventParser import EventParser
+from FetchedPage import any_class
 from parser_common_code import (
     initialize_csv_dict,
     set_start_end_fields_from_start_dt,
@@ -53,6 +54,11 @@ def extract_event_datetimes(soup: bs4.BeautifulSoup) -> list[dt.datetime]:
 
 
 class BirdlandParser(EventParser):
+    PARSE_ONLY = (
+        ("div", {"class": any_class("tw-name", "tw-date-time", "tw-description")}),
+        ("img", {"class": any_class("event-img")}),
+    )
+
     @staticmethod
     def parse_soup_to_event(url, soup):
         """Parses a soup object into a dictionary whose keys are the CSV rows
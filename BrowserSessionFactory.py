@@ -0,0 +1,175 @@
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from time import monotonic, time
+
+from selenium import webdriver
+from selenium.common.exceptions import SessionNotCreatedException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+
+logger = logging.getLogger(__name__)
+# Import undetected_chromedriver only if you're planning to use it
+try:
+    import undetected_chromedriver as uc
+
+    UNDETECTED_AVAILABLE = True
+except ImportError:
+    UNDETECTED_AVAILABLE = False
+
+
+class BrowserSessionFactory:
+    """
+    Creates Chrome sessions for every code path that needs a browser.
+    The chromedriver binary is resolved once and its path cached on disk, so starting a session
+    doesn't go through webdriver-manager's version check. Each session can use a named, persistent
+    profile directory, so cookies and dismissed consent banners survive between runs.
+    """
+
+    def __init__(
+        self,
+        headless: bool = True,
+        profile_dir: str | None = None,
+        driver_cache_file: str | None = None,
+        driver_cache_ttl_seconds: float = 7 * 24 * 60 * 60,
+    ):
+        """
+        Args:
+            headless: Default for sessions that don't choose for themselves
+            profile_dir: Directory holding one Chrome profile per profile name, or None for throwaway profiles
+            driver_cache_file: JSON file the resolved chromedriver path is saved to, or None to keep it in memory
+            driver_cache_ttl_seconds: Age after which the driver is resolved again, to pick up Chrome updates
+        """
+        self.headless = headless
+        self.profile_dir = profile_dir
+        self.driver_cache_file = driver_cache_file
+        self.driver_cache_ttl_seconds = driver_cache_ttl_seconds
+        self._lock = threading.Lock()
+        self._driver_path: str | None = None
+
+    def _read_cached_driver_path(self) -> str | None:
+        if not self.driver_cache_file:
+            return None
+        try:
+            with open(self.driver_cache_file, encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.info(
+                f"Ignoring unreadable driver cache {self.driver_cache_file}: {e}"
+            )
+            return None
+        if time() - entry["resolved_at"] > self.driver_cache_ttl_seconds:
+            return None
+        if not os.path.isfile(entry["path"]):
+            return None
+        return entry["path"]
+
+    def _save_driver_path(self, driver_path: str) -> None:
+        if not self.driver_cache_file:
+            return
+        temp_file = f"{self.driver_cache_file}.tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump({"path": driver_path, "resolved_at": time()}, f)
+        os.replace(temp_file, self.driver_cache_file)
+
+    def driver_path(self, refresh: bool = False) -> str:
+        """
+        Return the chromedriver path, resolving it with webdriver-manager only if no cached path is usable.
+
+        Args:
+            refresh: Resolve the driver again even if a path is cached
+        """
+        with self._lock:
+            if refresh:
+                self._driver_path = None
+            elif self._driver_path is None:
+                self._driver_path = self._read_cached_driver_path()
+
+            if self._driver_path is None:
+                logger.info("Resolving chromedriver")
+                self._driver_path = ChromeDriverManager().install()
+                self._save_driver_path(self._driver_path)
+
+            return self._driver_path
+
+    def _profile_path(self, profile_name: str | None) -> str | None:
+        if self.profile_dir is None or profile_name is None:
+            return None
+        profile_path = Path(self.profile_dir, profile_name).resolve()
+        profile_path.mkdir(parents=True, exist_ok=True)
+        return str(profile_path)
+
+    def _chrome_options(
+        self, headless: bool, profile_path: str | None, page_load_strategy: str
+    ) -> Options:
+        opts = Options()
+        opts.page_load_strategy = page_load_strategy
+        if headless:
+            opts.add_argument("--headless=new")
+        if profile_path:
+            opts.add_argument(f"--user-data-dir={profile_path}")
+        opts.add_argument("--no-first-run")
+        opts.add_argument("--no-default-browser-check")
+        # Set log level to warning or higher severity
+        opts.add_argument("--log-level=3")
+        return opts
+
+    def create_driver(
+        self,
+        profile_name: str | None = None,
+        headless: bool | None = None,
+        page_load_strategy: str = "normal",
+        undetected: bool = False,
+    ):
+        """
+        Start a Chrome session.
+
+        Args:
+            profile_name: Name of the persistent profile to use. Chrome locks a profile while it runs,
+                so sessions running at the same time need different names.
+            headless: Whether to hide the browser window, or None for the factory's default
+            page_load_strategy: "normal" waits for every resource to load, "eager" only for the DOM
+            undetected: Use undetected_chromedriver
+
+        Returns:
+            The WebDriver
+        """
+        if headless is None:
+            headless = self.headless
+        profile_path = self._profile_path(profile_name)
+        start = monotonic()
+
+        if undetected and UNDETECTED_AVAILABLE:
+            opts = uc.ChromeOptions()
+            opts.page_load_strategy = page_load_strategy
+            # uc manages driver itself
+            driver = uc.Chrome(
+                options=opts, user_data_dir=profile_path, headless=headless
+            )
+        else:
+            try:
+                driver = webdriver.Chrome(
+                    service=Service(self.driver_path()),
+                    options=self._chrome_options(
+                        headless, profile_path, page_load_strategy
+                    ),
+                )
+            except SessionNotCreatedException as e:
+                # The cached driver no longer matches the installed Chrome
+                logger.info(
+                    f"Cached chromedriver failed to start ({e}), resolving it again"
+                )
+                driver = webdriver.Chrome(
+                    service=Service(self.driver_path(refresh=True)),
+                    options=self._chrome_options(
+                        headless, profile_path, page_load_strategy
+                    ),
+                )
+
+        logger.info(f"Started browser in {monotonic() - start:.2f} seconds")
+        return driver
@@ -5,12 +5,12 @@ from time import sleep
 from EventParser import EventParser
 from parser_common_code import (
     any_match,
+    get_browser_session_factory,
     initialize_csv_dict,
     parse_event_tags,
     set_relevant_from_dict,
     set_start_end_fields_from_start_dt,
 )
-from SeleniumLoader import SeleniumLoader
 
 CARNEGIE_DEFAULT_IMAGE_URL = "https://carnegiehall.imgix.net/-/media/CarnegieHall/Images/About/Rentals/Carnegie-Hall-Exterior-at-Night-Updated-21-22.jpg"
 
@@ -19,7 +19,10 @@ logger = logging.getLogger(__name__)
 
 
 def get_event_urls_from_calendar_page() -> list[str]:
-    driver = SeleniumLoader().driver
+    # The calendar is scrolled by hand, so the browser has to be visible
+    driver = get_browser_session_factory().create_driver(
+        "carnegie_hall", headless=False
+    )
     driver.get("https://www.carnegiehall.org/#calendar")
 
     if False:
@@ -75,6 +78,8 @@ def get_event_urls_from_calendar_page() -> list[str]:
 
 
 class CarnegieHallParser(EventParser):
+    INDEXED_SOUP = True
+
     def parse_soup_to_event(self, url, soup):
         """Parses a soup object into a dictionary whose keys are the CSV rows
         required by the imported CSV
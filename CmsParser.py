@@ -1,5 +1,4 @@
 import datetime as dt
-import json
 import logging
 import re
 from pathlib import Path, PurePath
@@ -8,6 +7,7 @@ from bs4 import BeautifulSoup
 
 from EventParser import EventParser
 from parser_common_code import (
+    decode_json_ld,
     get_full_image_path,
     initialize_csv_dict,
     parse_event_tags,
@@ -99,7 +99,7 @@ class CmsParser(EventParser):
             )
         except Exception as ex:
             for i, c in enumerate(
-                json.loads(
+                decode_json_ld(
                     soup.find("script", attrs={"type": "application/ld+json"}).contents[
                         0
                     ]
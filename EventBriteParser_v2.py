@@ -1,30 +1,36 @@
 import html
-import json
 import logging
 from datetime import datetime
-from pathlib import PurePath
 
 from unidecode import unidecode
 
 import importer_globals as G
-from EventParser import EventParser
+from EventParser import FETCH_MODE_BROWSER, FETCH_MODE_HTTP, EventParser
 from parser_common_code import (
+    decode_json_ld,
     encode_html,
     initialize_csv_dict,
     is_in_new_york,
     parse_price_range,
-    parse_url_to_soup,
     retrieve_venues,
     set_relevant_from_dict,
     set_start_end_fields_from_start_dt,
     set_tags_from_dict,
-    sleep_random,
 )
 
 logger = logging.getLogger(__name__)
 
 
 class EventBriteParser_v2(EventParser):
+    FETCH_MODE = FETCH_MODE_HTTP
+
+    # The first few pages of piano events in Manhattan
+    LISTING_URL_TEMPLATE = (
+        "https://www.eventbrite.com/d/ny--new-york/piano/?mode=search&page={page}"
+    )
+    LISTING_LINK_SELECTOR = "a.event-card-link"
+    LISTING_FETCH_MODE = FETCH_MODE_BROWSER
+
     VENUES = {
         "468 W 143rd St": "Our Lady of Lourdes School",
         "790 11th Ave": "Klavierhaus",
@@ -144,29 +150,9 @@ class EventBriteParser_v2(EventParser):
         else:
             return soup
 
-    @staticmethod
-    def read_urls(url_file_name):
-        """Read the event-page URLs for the first few pages of piano events in Manhattan"""
-        urls = set()
-        for page in range(5):
-            sleep_random()
-            url_this_page = f"https://www.eventbrite.com/d/ny--new-york/piano/?mode=search&page={page + 1}"
-            logger.info("Reading URL {0}".format(url_this_page))
-
-            soup = parse_url_to_soup(url_this_page)
-
-            links = soup.find_all("a", attrs={"class": "event-card-link"})
-            for link in links:
-                url_this_event = link["href"].split("?")[0]
-                urls.add(url_this_event)
-
-        # Write the URLs out to a file for safekeeping
-        url_file_path = PurePath("../Data", url_file_name)
-        with open(url_file_path, "w", newline="\n") as url_file:
-            for url_this_page in urls:
-                url_file.write(url_this_page + "\n")
-
-        return list(urls)
+    def clean_listing_url(self, href: str) -> str:
+        # Drop the search tracking parameters
+        return href.split("?")[0]
 
     @staticmethod
     def translate_venue(venue_from_page: str) -> str:
@@ -197,9 +183,9 @@ class EventBriteParser_v2(EventParser):
             event_json = soup.find_all("script", attrs={"type": "application/ld+json"})[
                 1
             ].contents[0]
-            # Some events have improperly encoded newlines
-            event_json = event_json.replace("\t", " ")
-            event_details = json.loads(event_json)
+            event_details = decode_json_ld(event_json)
+            if event_details is None:
+                raise ValueError("The JSON can't be repaired")
         except Exception as ex:
             logger.info(
                 "Unable to parse event-details JSON in {0}: {1}".format(url, ex)
@@ -1,2 +1,81 @@
+# Ways an event page can be fetched
+FETCH_MODE_BROWSER = "browser"  # Render the page in Chrome through Selenium
+FETCH_MODE_HTTP = "http"  # Read the server-rendered HTML with a plain HTTP client
+FETCH_MODE_QT = (
+    "qt"  # Render the page in Qt WebEngine, in one long-lived renderer process
+)
+
+
 class EventParser(object):
     """Base class for event parsing"""
+
+    # Parsers whose data (JSON-LD, meta tags) is already in the raw HTML can use
+    # FETCH_MODE_HTTP to skip the browser round-trip
+    FETCH_MODE: str = FETCH_MODE_BROWSER
+
+    # CSS selector of an element whose presence shows that a browser-rendered page's data is present,
+    # so the browser can return without waiting for the rest of the page
+    READY_SELECTOR: str | None = None
+
+    # BeautifulSoup tree builder for this parser's pages, e.g., "lxml" for a parser whose rows
+    # compare_parser_backends.py shows match with it. None to use the run's default, html.parser.
+    HTML_PARSER_BACKEND: str | None = None
+
+    # Regions of the page the parser reads, as (name, attrs) pairs in SoupStrainer's form, e.g.,
+    # (("title", {}), ("div", {"class": any_class("event-details")})), with FetchedPage.any_class.
+    # Only those tags and their contents are parsed, which takes less time and memory. None to
+    # parse the whole page. A parser whose rows change with its regions (see
+    # compare_parser_backends.py --partial) needs wider regions.
+    PARSE_ONLY: tuple | None = None
+
+    # Parsers that need only the page's JSON-LD and meta tags set this and define
+    # parse_structured_data_to_event(url, data) instead of parse_soup_to_event, so no soup is built.
+    # It is given the page's structured_data.StructuredData and returns the event row or None.
+    STRUCTURED_DATA_ONLY: bool = False
+
+    # Parsers that make many find and find_all calls per page set this to be given an IndexedSoup,
+    # which looks elements up by tag name, class and id instead of walking the tree for each call.
+    # Check a parser's rows with compare_parser_backends.py --indexed when setting it.
+    INDEXED_SOUP: bool = False
+
+    # Paginated listing of event pages, crawled by ListingCrawler to discover event URLs.
+    # The template takes the page number, e.g., "https://example.com/events?page={page}".
+    LISTING_URL_TEMPLATE: str | None = None
+    LISTING_LINK_SELECTOR: str = (
+        "a"  # CSS selector of the event links on a listing page
+    )
+    LISTING_FIRST_PAGE: int = 1
+    LISTING_MAX_PAGES: int = 5
+    LISTING_FETCH_MODE: str | None = (
+        None  # None to fetch listing pages like event pages
+    )
+
+    # Sitemaps listing the event pages, read by SitemapDiscovery. Without SITEMAP_URLS, the sitemaps
+    # are taken from the robots.txt of SITEMAP_SITE_URL. Only URLs matching the pattern are used.
+    SITEMAP_URLS: tuple[str, ...] = ()
+    SITEMAP_SITE_URL: str | None = None
+    SITEMAP_URL_PATTERN: str | None = None  # Regular expression
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Checked when the parser is defined, rather than when its first page is parsed
+        if cls.STRUCTURED_DATA_ONLY and not callable(
+            getattr(cls, "parse_structured_data_to_event", None)
+        ):
+            raise TypeError(
+                f"{cls.__name__} sets STRUCTURED_DATA_ONLY without defining parse_structured_data_to_event"
+            )
+
+    def clean_listing_url(self, href: str) -> str:
+        """Turn a link found on a listing page into an event URL"""
+        return href
+
+    def is_last_listing_page(self, page_urls: list[str], new_urls: list[str]) -> bool:
+        """
+        Stop condition for the listing crawl, checked for each page in order
+        :param page_urls: event URLs found on the page
+        :param new_urls: those of them not scraped before
+        :return: whether to stop crawling after this page
+        """
+        # A page of events that were all scraped before means the rest are old too
+        return not new_urls
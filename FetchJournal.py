@@ -0,0 +1,185 @@
+import logging
+import sqlite3
+import threading
+from time import time
+
+logger = logging.getLogger(__name__)
+
+# URL states
+PENDING = "pending"  # Not fetched yet
+FETCHED = "fetched"  # Stored in the page archive
+FAILED = "failed"  # Couldn't be read; retried in later runs until its tries run out
+FILTERED = (
+    "filtered"  # Disallowed by robots.txt or rejected by the parser's content filter
+)
+
+
+class FetchJournal:
+    """
+    Durable record of what happened to every URL in a venue's fetch runs.
+    A run that is killed or crashes is left unfinished, and the next run resumes it, fetching only
+    the URLs that are still pending or that failed with tries left. A run is finished only once
+    none of its URLs is left to fetch.
+    """
+
+    def __init__(self, journal_path: str, max_tries: int):
+        """
+        Args:
+            journal_path: SQLite file holding the journal, created if missing
+            max_tries: Runs in which a failing URL is tried before it is given up on
+        """
+        self.journal_path = journal_path
+        self.max_tries = max_tries
+        self.run_id: int | None = None
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(journal_path, check_same_thread=False)
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY,
+                started_at REAL NOT NULL,
+                finished_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS urls (
+                run_id INTEGER NOT NULL REFERENCES runs (id),
+                url TEXT NOT NULL,
+                state TEXT NOT NULL,
+                tries INTEGER NOT NULL DEFAULT 0,
+                reason TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (run_id, url)
+            );
+            CREATE INDEX IF NOT EXISTS idx_state ON urls (run_id, state);
+            """)
+        self._connection.commit()
+
+    def start_run(self, urls) -> int:
+        """
+        Resume the last run if it didn't finish, or start a new one. URLs not yet in the run are
+        added to it as pending.
+
+        Args:
+            urls: URLs to fetch in this run
+
+        Returns:
+            The run ID
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT id FROM runs WHERE finished_at IS NULL ORDER BY id DESC LIMIT 1"
+            ).fetchone()
+            if row:
+                self.run_id = row[0]
+            else:
+                self.run_id = self._connection.execute(
+                    "INSERT INTO runs (started_at) VALUES (?)", (time(),)
+                ).lastrowid
+            now = time()
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO urls (run_id, url, state, updated_at) VALUES (?, ?, ?, ?)",
+                [(self.run_id, url, PENDING, now) for url in urls],
+            )
+            self._connection.commit()
+
+        counts = self.counts()
+        if row:
+            logger.info(f"Resuming fetch run {self.run_id}: {counts}")
+        else:
+            logger.info(f"Starting fetch run {self.run_id} with {counts[PENDING]} URLs")
+        return self.run_id
+
+    def urls_to_fetch(self) -> list[str]:
+        """Return the run's pending URLs and its failed URLs that have tries left, in the order they were added"""
+        with self._lock:
+            return [
+                url
+                for (url,) in self._connection.execute(
+                    """SELECT url FROM urls
+                    WHERE run_id = ? AND (state = ? OR (state = ? AND tries < ?))
+                    ORDER BY rowid""",
+                    (self.run_id, PENDING, FAILED, self.max_tries),
+                )
+            ]
+
+    def urls_in_states(self, *states: str) -> list[str]:
+        """Return the run's URLs in any of the given states, in the order they were added"""
+        with self._lock:
+            return [
+                url
+                for (url,) in self._connection.execute(
+                    f"""SELECT url FROM urls
+                    WHERE run_id = ? AND state IN ({", ".join("?" * len(states))})
+                    ORDER BY rowid""",
+                    (self.run_id, *states),
+                )
+            ]
+
+    def _mark(self, url: str, state: str, reason: str | None = None) -> None:
+        with self._lock:
+            self._connection.execute(
+                """UPDATE urls SET state = ?, reason = ?, updated_at = ?, tries = tries + ?
+                WHERE run_id = ? AND url = ?""",
+                (state, reason, time(), int(state == FAILED), self.run_id, url),
+            )
+            self._connection.commit()
+
+    def mark_fetched(self, url: str) -> None:
+        """Record that a URL's page is stored"""
+        self._mark(url, FETCHED)
+
+    def mark_failed(self, url: str, reason: str) -> None:
+        """Record that a URL couldn't be read, and why"""
+        self._mark(url, FAILED, reason)
+
+    def mark_filtered(self, url: str, reason: str) -> None:
+        """Record that a URL was skipped on purpose, and why"""
+        self._mark(url, FILTERED, reason)
+
+    def counts(self) -> dict[str, int]:
+        """Return the number of the run's URLs in each state"""
+        counts = dict.fromkeys((PENDING, FETCHED, FAILED, FILTERED), 0)
+        with self._lock:
+            for state, count in self._connection.execute(
+                "SELECT state, COUNT(*) FROM urls WHERE run_id = ? GROUP BY state",
+                (self.run_id,),
+            ):
+                counts[state] = count
+        return counts
+
+    def failures(self) -> list[tuple[str, int, str]]:
+        """Return the run's failed URLs with their tries and the reason for the last failure"""
+        with self._lock:
+            return self._connection.execute(
+                "SELECT url, tries, reason FROM urls WHERE run_id = ? AND state = ? ORDER BY rowid",
+                (self.run_id, FAILED),
+            ).fetchall()
+
+    def finish_run(self) -> bool:
+        """
+        Finish the run if none of its URLs is left to fetch. Otherwise it is left open for the
+        next run to resume.
+
+        Returns:
+            Whether the run finished
+        """
+        num_left = len(self.urls_to_fetch())
+        for url, tries, reason in self.failures():
+            if tries >= self.max_tries:
+                logger.info(f"Gave up on {url} after {tries} tries: {reason}")
+
+        if num_left:
+            logger.info(
+                f"Fetch run {self.run_id} left open with {num_left} URLs still to fetch: {self.counts()}"
+            )
+            return False
+
+        with self._lock:
+            self._connection.execute(
+                "UPDATE runs SET finished_at = ? WHERE id = ?", (time(), self.run_id)
+            )
+            self._connection.commit()
+        logger.info(f"Finished fetch run {self.run_id}: {self.counts()}")
+        return True
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
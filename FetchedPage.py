@@ -0,0 +1,200 @@
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from time import time
+
+import requests
+from bs4 import BeautifulSoup, SoupStrainer
+
+import importer_globals as G
+from structured_data import StructuredData, extract_structured_data
+
+logger = logging.getLogger(__name__)
+
+# zstd compresses pages smaller and faster than gzip, when the package is installed
+try:
+    import zstandard
+
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+# lxml builds soups several times faster than the pure-Python html.parser, when it is installed
+try:
+    import lxml
+
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+# BeautifulSoup tree builders
+HTML_PARSER_BACKEND = "html.parser"
+LXML_BACKEND = "lxml"
+
+HTML_UTF8 = "text/html; charset=utf-8"
+
+ZSTD_LEVEL = 10
+
+
+def markup_from_content(content: bytes, content_type: str | None) -> str | bytes:
+    """Return the page markup, leaving the charset to BeautifulSoup when the server didn't declare one"""
+    encoding = requests.utils.get_encoding_from_headers(
+        {"content-type": content_type or ""}
+    )
+    if encoding and "charset" in (content_type or "").lower():
+        return content.decode(encoding, errors="replace")
+    return content
+
+
+def resolve_parser_backend(backend: str | None = None) -> str:
+    """
+    Return the tree builder to parse with: the one asked for, or the run's default
+    (G.HTML_PARSER_BACKEND), using html.parser if lxml isn't installed
+    """
+    backend = backend or G.HTML_PARSER_BACKEND
+    if backend == LXML_BACKEND and not LXML_AVAILABLE:
+        return HTML_PARSER_BACKEND
+    return backend
+
+
+def any_class(*class_names: str) -> re.Pattern:
+    """
+    Return a pattern matching a class attribute that holds any of the classes, for PARSE_ONLY
+    regions. While parsing, a class attribute is matched as one string, so a plain class name
+    misses tags that have other classes too.
+    """
+    names = "|".join(re.escape(class_name) for class_name in class_names)
+    return re.compile(rf"(^|\s)({names})(\s|$)")
+
+
+class RegionStrainer(SoupStrainer):
+    """
+    SoupStrainer that keeps every tag matching any of several regions, each a (name, attrs) pair
+    as passed to SoupStrainer, along with everything inside it. A single SoupStrainer can only
+    match one name and attrs combination.
+    """
+
+    def __init__(self, regions: tuple):
+        super().__init__()
+        self.region_strainers = [SoupStrainer(name, attrs) for name, attrs in regions]
+
+    # BeautifulSoup 4.13 and later ask this while parsing
+    def allow_tag_creation(self, nsprefix, name, attrs) -> bool:
+        return any(
+            strainer.allow_tag_creation(nsprefix, name, attrs)
+            for strainer in self.region_strainers
+        )
+
+    # Earlier versions ask this instead
+    def search_tag(self, markup_name=None, markup_attrs={}):
+        for strainer in self.region_strainers:
+            found = strainer.search_tag(markup_name, markup_attrs)
+            if found:
+                return found
+        return None
+
+
+def make_soup(
+    markup, backend: str | None = None, parse_only: tuple | None = None
+) -> BeautifulSoup:
+    """
+    Parse markup with a backend, by default the run's. If regions to parse are given (see
+    EventParser.PARSE_ONLY), only those subtrees are built.
+    """
+    if parse_only is None:
+        return BeautifulSoup(markup, resolve_parser_backend(backend))
+    return BeautifulSoup(
+        markup, resolve_parser_backend(backend), parse_only=RegionStrainer(parse_only)
+    )
+
+
+def compress_body(body: bytes) -> tuple[str, bytes]:
+    """Compress a page body, returning the compression used and the compressed bytes"""
+    if ZSTD_AVAILABLE:
+        return "zstd", zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+    return "gzip", gzip.compress(body, compresslevel=6)
+
+
+def decompress_body(compression: str, data: bytes) -> bytes:
+    """Reverse compress_body"""
+    if compression == "zstd":
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("Install zstandard to read pages archived with zstd")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if compression == "gzip":
+        return gzip.decompress(data)
+    if compression == "none":
+        return data
+    raise ValueError(f'Unknown page compression "{compression}"')
+
+
+@dataclass
+class FetchedPage:
+    """A page exactly as it was read, with its fetch metadata"""
+
+    url: str  # URL requested
+    body: bytes
+    content_type: str | None = None
+    status: int | None = None  # None for pages rendered in the browser
+    headers: dict[str, str] = field(default_factory=dict)
+    final_url: str | None = None  # URL after redirects
+    fetched_at: float = field(default_factory=time)
+    _soups: dict[tuple[str, str], BeautifulSoup] = field(
+        default_factory=dict, repr=False, compare=False
+    )
+    _structured_data: StructuredData | None = field(
+        default=None, repr=False, compare=False
+    )
+
+    def content_hash(self) -> str:
+        """Return the SHA-256 hash of the body"""
+        return hashlib.sha256(self.body).hexdigest()
+
+    def markup(self) -> str | bytes:
+        return markup_from_content(self.body, self.content_type)
+
+    def structured_data(self) -> StructuredData:
+        """Return the page's JSON-LD blocks and meta tags, extracting them on first use"""
+        if self._structured_data is None:
+            self._structured_data = extract_structured_data(self.markup())
+        return self._structured_data
+
+    def soup(
+        self, backend: str | None = None, parse_only: tuple | None = None
+    ) -> BeautifulSoup:
+        """
+        Return the page parsed with a backend (by default the run's), parsing it on first use.
+        With regions to parse, the soup holds only those subtrees.
+        """
+        backend = resolve_parser_backend(backend)
+        # The regions hold dicts, so their repr stands in for them in the key
+        key = (backend, repr(parse_only))
+        if key not in self._soups:
+            self._soups[key] = make_soup(self.markup(), backend, parse_only)
+        return self._soups[key]
+
+    @classmethod
+    def from_contents_row(cls, row: list[str]) -> "FetchedPage":
+        """
+        Read a row of a contents CSV, the page store used before the page archive: URL, metadata JSON
+        and the compressed body, or (url, html) in files written before pages were stored raw
+        """
+        url = row[0].strip()  # Remove ending newline
+        if len(row) == 2:
+            return cls(url, row[1].encode("utf-8"), HTML_UTF8, fetched_at=0.0)
+
+        _, metadata_json, data = row
+        metadata = json.loads(metadata_json)
+        return cls(
+            url,
+            decompress_body(metadata["compression"], base64.b64decode(data)),
+            metadata["content_type"],
+            metadata["status"],
+            metadata["headers"],
+            metadata["final_url"],
+            metadata["fetched_at"],
+        )
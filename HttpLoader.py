@@ -0,0 +1,200 @@
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import importer_globals as G
+from EventParser import FETCH_MODE_BROWSER
+from FetchedPage import FetchedPage
+from PageCache import CachedPage, PageCache
+
+logger = logging.getLogger(__name__)
+
+# requests only decodes Brotli responses when a Brotli package is installed
+try:
+    import brotli  # noqa: F401
+
+    BROTLI_AVAILABLE = True
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+
+        BROTLI_AVAILABLE = True
+    except ImportError:
+        BROTLI_AVAILABLE = False
+
+
+class HttpLoader:
+    """Loads server-rendered pages with a pooled, keep-alive HTTP session instead of a browser"""
+
+    def __init__(
+        self, pool_size: int | None = None, page_cache: PageCache | None = None
+    ):
+        """
+        Args:
+            pool_size: Number of keep-alive connections kept per host
+            page_cache: Cache used to revalidate pages with conditional GETs
+        """
+        if pool_size is None:
+            pool_size = G.HTTP_POOL_SIZE
+
+        self.page_cache = page_cache
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(
+            {
+                "User-Agent": G.USER_AGENT,
+                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+                "Accept-Encoding": (
+                    "gzip, deflate, br" if BROTLI_AVAILABLE else "gzip, deflate"
+                ),
+            }
+        )
+
+    def close(self):
+        """Closes the pooled connections."""
+        self.session.close()
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """
+        Issues a GET request on the shared session.
+
+        :param url: URL to load.
+        :return: The response, with its status already checked.
+        """
+        kwargs.setdefault("timeout", G.HTTP_TIMEOUT_SECONDS)
+        response = self.session.get(url, **kwargs)
+        response.raise_for_status()
+        return response
+
+    def fetch(self, url: str, headers: dict | None = None) -> tuple[bytes, dict]:
+        """
+        Reads a URL through the page cache.
+
+        :param url: URL to load.
+        :param headers: Extra request headers.
+        :return: The response body and the Content-Type header.
+        """
+        page = self.fetch_page(url, headers)
+        return page.body, {"Content-Type": page.content_type}
+
+    def fetch_page(self, url: str, headers: dict | None = None) -> FetchedPage:
+        """
+        Reads a URL through the page cache. A cached copy is revalidated with a conditional
+        GET and served from disk if the server answers 304 Not Modified.
+
+        :param url: URL to load.
+        :param headers: Extra request headers.
+        :return: The response body, with the response's status, headers and final URL.
+        """
+        request_headers = dict(headers or {})
+        cached_page = None
+        if self.page_cache is not None:
+            cached_page = self.page_cache.lookup(url)
+            if cached_page is not None:
+                request_headers.update(PageCache.conditional_headers(cached_page))
+                self.page_cache.increment("revalidations")
+
+        response = self.session.get(
+            url, headers=request_headers, timeout=G.HTTP_TIMEOUT_SECONDS
+        )
+        if response.status_code == 304 and cached_page is not None:
+            logger.info(f"Not modified, using cached copy of {url}")
+            self.page_cache.increment("hits")
+            self.page_cache.touch(url, headers=response.headers)
+            return cached_page.fetched_page(url)
+
+        response.raise_for_status()
+        page = FetchedPage(
+            url,
+            response.content,
+            response.headers.get("Content-Type"),
+            response.status_code,
+            dict(response.headers),
+            response.url,
+        )
+        if self.page_cache is not None:
+            self.page_cache.increment("misses")
+            self.page_cache.store(page)
+
+        return page
+
+    def check_not_modified(
+        self,
+        url: str,
+        cached_page: CachedPage | None,
+        fetch_mode: str = FETCH_MODE_BROWSER,
+    ) -> tuple[bool, dict | None]:
+        """
+        Revalidates a cached copy of a page with a conditional HEAD request, for pages that are
+        rendered elsewhere (e.g., in a browser) but can still be cached. Without a cached copy,
+        the request only reads the page's validators.
+
+        :param url: URL to check.
+        :param cached_page: Cached copy of the page, or None.
+        :param fetch_mode: How the cached copy was read.
+        :return: Whether the cached copy is still current, and the validators of the response
+            (None if the request failed).
+        """
+        if self.page_cache is None:
+            return False, None
+
+        request_headers = PageCache.conditional_headers(cached_page)
+        try:
+            response = self.session.head(
+                url,
+                headers=request_headers,
+                timeout=G.HTTP_TIMEOUT_SECONDS,
+                allow_redirects=True,
+            )
+        except Exception as e:
+            logger.info(f"Error checking {url}: {e}")
+            return False, None
+
+        if cached_page is not None:
+            self.page_cache.increment("revalidations")
+            if response.status_code == 304:
+                logger.info(f"Not modified, using cached copy of {url}")
+                self.page_cache.increment("hits")
+                self.page_cache.touch(url, fetch_mode, response.headers)
+                return True, None
+        self.page_cache.increment("misses")
+
+        validators = {
+            k: response.headers[k]
+            for k in ("ETag", "Last-Modified")
+            if response.ok and k in response.headers
+        }
+        return False, validators
+
+    def page_from_url(self, url: str, raise_errors: bool = False) -> FetchedPage | None:
+        """
+        Loads a web page over HTTP.
+
+        :param url: URL to load.
+        :param raise_errors: Raise errors to the caller (e.g., for retrying) instead of returning None.
+        :return: The page as the server sent it.
+        """
+        try:
+            page = self.fetch_page(url)
+        except Exception as e:
+            if raise_errors:
+                raise
+            logger.info(f"Error loading {url}: {e}")
+            page = None
+
+        return page
+
+    def soup_from_url(self, url: str, raise_errors: bool = False):
+        """
+        Loads a web page over HTTP and returns its BeautifulSoup representation.
+
+        :param url: URL to load.
+        :param raise_errors: Raise errors to the caller (e.g., for retrying) instead of returning None.
+        :return: BeautifulSoup object of the page source.
+        """
+        page = self.page_from_url(url, raise_errors)
+        return page.soup() if page else None
@@ -0,0 +1,201 @@
+import hashlib
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from time import monotonic
+
+from HttpLoader import HttpLoader
+from PolitenessScheduler import PolitenessScheduler
+from retry_policy import CircuitBreaker, RetryPolicy, call_with_retry
+
+logger = logging.getLogger(__name__)
+
+# Some image servers refuse clients that don't look like a browser
+IMAGE_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 6.1; Win64; x64; rv:73.0) Gecko/20100101 Firefox/73.0"
+)
+
+
+class ImageDownloader:
+    """
+    Downloads featured images on background threads over keep-alive connections,
+    so page fetching never waits on image I/O.
+    """
+
+    def __init__(
+        self,
+        http_loader: HttpLoader,
+        num_workers: int = 4,
+        retry_policy: RetryPolicy | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        politeness_scheduler: PolitenessScheduler | None = None,
+    ):
+        """
+        Args:
+            http_loader: Loader whose pooled session (and page cache) the downloads use
+            num_workers: Number of images downloaded at once
+            retry_policy: Backoff for transient download errors
+            circuit_breaker: Per-host breaker shared with the page fetches
+            politeness_scheduler: Per-host request spacing shared with the page fetches
+        """
+        self.http_loader = http_loader
+        self.retry_policy = retry_policy
+        self.circuit_breaker = circuit_breaker
+        self.politeness_scheduler = politeness_scheduler
+        self._executor = ThreadPoolExecutor(
+            max_workers=num_workers, thread_name_prefix="image"
+        )
+        self._lock = threading.Lock()
+        self._futures: list[Future] = []
+
+        # Files already saved, per folder, read from disk once instead of checked per image
+        self._saved_files: dict[Path, set[str]] = {}
+        # Paths queued in this run, so an image shared by several events is downloaded once
+        self._queued_paths: set[Path] = set()
+        # Saved files by size, so a new image is only hashed against files it could equal
+        self._files_by_size: dict[Path, dict[int, list[Path]]] = {}
+        self._hashes: dict[Path, str] = {}
+
+        # Run summary
+        self.num_downloaded = 0
+        self.num_already_saved = 0
+        self.num_duplicates = 0
+        self.num_failed = 0
+        self.bytes_downloaded = 0
+        self.seconds_downloading = 0.0
+
+    def _index_folder(self, folder: Path) -> set[str]:
+        """Return the names of the files saved in a folder, reading the folder on first use"""
+        saved_files = self._saved_files.get(folder)
+        if saved_files is None:
+            folder.mkdir(parents=True, exist_ok=True)
+            saved_files = self._saved_files[folder] = set()
+            files_by_size = self._files_by_size[folder] = {}
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        saved_files.add(entry.name)
+                        files_by_size.setdefault(entry.stat().st_size, []).append(
+                            Path(entry.path)
+                        )
+        return saved_files
+
+    def submit(self, full_image_path: str, image_url: str) -> None:
+        """
+        Queue an image for download unless it is already saved or queued.
+
+        Args:
+            full_image_path: Where to save the image
+            image_url: Where to read the image from
+        """
+        path = Path(full_image_path)
+        with self._lock:
+            if path.name in self._index_folder(path.parent):
+                logger.info(f"Image {full_image_path} already exists")
+                self.num_already_saved += 1
+                return
+            if path in self._queued_paths:
+                return
+            self._queued_paths.add(path)
+            self._futures.append(self._executor.submit(self._download, path, image_url))
+
+    def _file_hash(self, path: Path) -> str:
+        """Return a saved file's hash, reading the file on first use without holding the lock"""
+        with self._lock:
+            file_hash = self._hashes.get(path)
+        if file_hash is None:
+            file_hash = hashlib.sha256(path.read_bytes()).hexdigest()
+            with self._lock:
+                self._hashes[path] = file_hash
+        return file_hash
+
+    def _find_duplicate(self, path: Path, raw_image_data: bytes) -> Path | None:
+        """
+        Return a saved file in the same folder with identical contents, if any. Images are hashed
+        without holding the lock, so other downloads aren't held up.
+        """
+        with self._lock:
+            candidates = list(
+                self._files_by_size[path.parent].get(len(raw_image_data), [])
+            )
+        if not candidates:
+            return None
+        new_hash = hashlib.sha256(raw_image_data).hexdigest()
+        for candidate in candidates:
+            if self._file_hash(candidate) == new_hash:
+                return candidate
+        return None
+
+    def _download(self, path: Path, image_url: str) -> None:
+        # Image hosts are spaced like page hosts
+        if self.politeness_scheduler is not None:
+            self.politeness_scheduler.wait_for_turn(image_url)
+        start = monotonic()
+        try:
+            raw_image_data, _ = call_with_retry(
+                lambda: self.http_loader.fetch(
+                    image_url, headers={"User-Agent": IMAGE_USER_AGENT}
+                ),
+                image_url,
+                self.retry_policy,
+                self.circuit_breaker,
+            )
+        except Exception as e:
+            logger.info(f"Unable to download image {image_url}: {e}")
+            with self._lock:
+                self.num_failed += 1
+                self._queued_paths.discard(path)
+            return
+
+        duplicate = self._find_duplicate(path, raw_image_data)
+        with self._lock:
+            self.bytes_downloaded += len(raw_image_data)
+            self.seconds_downloading += monotonic() - start
+
+        saved = False
+        if duplicate is not None:
+            # Identical image saved under another name: link to it rather than storing it twice
+            try:
+                os.link(duplicate, path)
+                logger.info(f"Image {path} is identical to {duplicate}, linked")
+                saved = True
+            except OSError:
+                pass
+        if not saved:
+            with open(path, "wb") as saved_image_file:
+                logger.info(f"Saving image {path}")
+                saved_image_file.write(raw_image_data)
+
+        with self._lock:
+            self._saved_files[path.parent].add(path.name)
+            self._files_by_size[path.parent].setdefault(len(raw_image_data), []).append(
+                path
+            )
+            if duplicate is not None:
+                self.num_duplicates += 1
+            else:
+                self.num_downloaded += 1
+
+    def wait(self) -> None:
+        """Wait for every queued download to finish"""
+        with self._lock:
+            futures = list(self._futures)
+            self._futures.clear()
+        wait(futures)
+
+    def summary(self) -> dict:
+        """Return the counts, bytes and time spent on images in this run"""
+        with self._lock:
+            return {
+                "downloaded": self.num_downloaded,
+                "already_saved": self.num_already_saved,
+                "duplicates": self.num_duplicates,
+                "failed": self.num_failed,
+                "bytes": self.bytes_downloaded,
+                "seconds": round(self.seconds_downloading, 3),
+            }
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
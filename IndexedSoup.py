@@ -0,0 +1,148 @@
+from collections import defaultdict
+
+from bs4 import BeautifulSoup, NavigableString, Tag
+
+# Keywords of find and find_all that the index answers; any other sends the call to the soup
+INDEXED_KEYWORDS = {"limit"}
+
+
+class IndexedSoup:
+    """
+    A soup with its elements indexed by tag name, class and id in one traversal, so that repeated
+    find and find_all calls look the elements up instead of walking the whole tree each time.
+    Calls the index can't answer, such as ones matching by string, regular expression or function,
+    and every other soup attribute (select, title, get_text, ...) go to the soup itself, so a parser
+    can take an IndexedSoup wherever it took a soup. The elements found are ordinary soup elements.
+    """
+
+    def __init__(self, soup: BeautifulSoup) -> None:
+        """
+        Args:
+            soup: The parsed page
+        """
+        self.soup = soup
+        self._by_name: dict[str, list[Tag]] = defaultdict(list)
+        self._by_class: dict[str, list[Tag]] = defaultdict(list)
+        self._by_id: dict[str, list[Tag]] = defaultdict(list)
+        self._strings: list[NavigableString] | None = None  # Collected on first use
+        self._strings_containing: dict[str, list[NavigableString]] = {}
+
+        # Descendants come in document order, so every list is in document order too. This runs
+        # for every element of the page, so the dictionaries are looked up once, outside the loop.
+        by_name, by_class, by_id = self._by_name, self._by_class, self._by_id
+        for element in soup.descendants:
+            if not isinstance(element, Tag):
+                continue
+            by_name[element.name].append(element)
+            attributes = element.attrs
+            if "class" in attributes:
+                for class_name in attributes["class"]:
+                    by_class[class_name].append(element)
+            if attributes.get("id"):
+                by_id[attributes["id"]].append(element)
+
+    def __getattr__(self, name: str):
+        return getattr(self.soup, name)
+
+    def __str__(self) -> str:
+        return str(self.soup)
+
+    def find_all(
+        self, name=None, attrs={}, recursive=True, string=None, **kwargs
+    ) -> list:
+        """
+        Like BeautifulSoup.find_all. Tag names and attribute values given as strings, including
+        class_ and id, are looked up in the index.
+        """
+        limit = kwargs.get("limit")
+        if isinstance(attrs, dict):
+            if "class_" in kwargs:
+                attrs = {**attrs, "class": kwargs.pop("class_")}
+            if "id" in kwargs:
+                attrs = {**attrs, "id": kwargs.pop("id")}
+        candidates = None
+        if recursive and string is None and INDEXED_KEYWORDS.issuperset(kwargs):
+            candidates = self._candidates(name, attrs)
+        if candidates is None:
+            return self.soup.find_all(name, attrs, recursive, string, **kwargs)
+
+        found = []
+        for element in candidates:
+            if (name is None or element.name == name) and all(
+                _attribute_matches(element, key, value) for key, value in attrs.items()
+            ):
+                found.append(element)
+                if len(found) == limit:
+                    break
+        return found
+
+    def find(self, name=None, attrs={}, recursive=True, string=None, **kwargs):
+        """Like BeautifulSoup.find"""
+        found = self.find_all(name, attrs, recursive, string, limit=1, **kwargs)
+        return found[0] if found else None
+
+    def strings_containing(self, text: str) -> list[NavigableString]:
+        """
+        Return the page's strings that contain a piece of text, in document order. Each text is
+        looked up once per page.
+        """
+        if self._strings is None:
+            self._strings = [
+                element
+                for element in self.soup.descendants
+                if isinstance(element, NavigableString)
+            ]
+        if text not in self._strings_containing:
+            self._strings_containing[text] = [s for s in self._strings if text in s]
+        return self._strings_containing[text]
+
+    def _candidates(self, name, attrs) -> list[Tag] | None:
+        """
+        Return the indexed elements a query can only match among, the shortest list that applies,
+        or None if the index can't answer the query
+        """
+        if not isinstance(attrs, dict):
+            return None  # A string or other value here matches the class
+        if name is not None and not isinstance(name, str):
+            return None
+        if not all(isinstance(value, str) for value in attrs.values()):
+            return None
+
+        lists = []
+        if name is not None:
+            lists.append(self._by_name.get(name, []))
+        class_name = attrs.get("class")
+        if class_name is not None:
+            if any(c.isspace() for c in class_name):
+                return None  # Matches the whole class attribute, which isn't indexed
+            lists.append(self._by_class.get(class_name, []))
+        if attrs.get("id") is not None:
+            lists.append(self._by_id.get(attrs["id"], []))
+        if not lists:
+            return None  # Nothing indexed to look up
+        return min(lists, key=len)
+
+
+def strings_containing(soup, text: str) -> list[NavigableString]:
+    """
+    Return the strings of a soup or an IndexedSoup that contain a piece of text, in document
+    order. An IndexedSoup looks each text up once per page; a plain soup is searched every call.
+    """
+    if isinstance(soup, IndexedSoup):
+        return soup.strings_containing(text)
+    return [
+        element
+        for element in soup.descendants
+        if isinstance(element, NavigableString) and text in element
+    ]
+
+
+def _attribute_matches(element: Tag, key: str, value: str) -> bool:
+    """Whether an element's attribute matches a string as it would in BeautifulSoup.find_all"""
+    element_value = element.get(key)
+    if element_value is None:
+        return False
+    if isinstance(element_value, list):
+        # Multi-valued attributes such as class match any one value or the whole attribute
+        return value in element_value or " ".join(element_value) == value
+    return element_value == value
@@ -27,6 +27,8 @@ def parse_date(str_date):
 
 
 class JazzOrgParser(EventParser):
+    INDEXED_SOUP = True
+
     def parse_image_url(self, soup) -> str:
         try:
             image_url = [
@@ -87,6 +87,8 @@ VENUE_TRANSLATIONS = {
 
 
 class JuilliardParser(EventParser):
+    READY_SELECTOR = "h1.event-hero-banner__title"
+
     def parse_image_url(self, soup) -> tuple[str | None, str | None, str | None]:
         try:
             # https://www.juilliard.edu/sites/default/files/styles/wide_640x360/public/events/20180925_JazzKenya_113_EDITED_1.jpg?itok=Thc7xiYw
@@ -1,9 +1,9 @@
-import json
+import html
 import logging
 import re
 from datetime import datetime
 
-from EventParser import EventParser
+from EventParser import FETCH_MODE_HTTP, EventParser
 from parser_common_code import (
     any_match,
     initialize_csv_dict,
@@ -32,9 +32,12 @@ COLLABORATIVE_HINTS = (
 
 
 class KaufmanParser(EventParser):
+    FETCH_MODE = FETCH_MODE_HTTP
+    STRUCTURED_DATA_ONLY = True
+
     @staticmethod
-    def parse_soup_to_event(url, soup):
-        """Parses a soup object into a dictionary whose keys are the CSV rows
+    def parse_structured_data_to_event(url, data):
+        """Parses a page's structured data into a dictionary whose keys are the CSV rows
         required by the imported CSV
         """
 
@@ -42,29 +45,14 @@ class KaufmanParser(EventParser):
         csv_dict = initialize_csv_dict(url)
 
         # Event JSON
-        event_json_list = soup.find_all("script", attrs={"type": "application/ld+json"})
-        if len(event_json_list) < 1:
+        if len(data.json_ld) < 1:
             logger.info("Skipping because no JSON script was found")
             return None
-        elif len(event_json_list) > 1:
+        elif len(data.json_ld) > 1:
             raise RuntimeError("Multiple JSON scripts found")
-
-        event_json_str = str(event_json_list[0].contents)
-        event_json_str = (
-            event_json_str.replace("\\n", "\n")
-            .replace("\\t", " ")
-            .replace("\\r", "\n")
-            .replace("'", "")
-        )
-        event_json_str = event_json_str.replace('"offers": \n  \n  "', '"\n  ')
-
-        try:
-            event_json = json.loads(
-                event_json_str, strict=False
-            )  # Allows newlines in quoted strings
-            event_json = event_json[0]
-        except Exception as ex:
-            raise
+        if data.json_ld[0] is None:
+            raise RuntimeError("Unable to decode the JSON script")
+        event_json = data.json_ld[0][0]
 
         # Venue
         venue = event_json["location"]["name"]
@@ -103,10 +91,13 @@ class KaufmanParser(EventParser):
 
         # Additional search for senior/student ticket pricing
         student_senior_price = None
-        price_info_elements = soup.find_all(
-            string=re.compile(r"senior and student", re.I)
+        # Text between tags, with its entities unescaped as soup strings would be
+        price_info_elements = (
+            html.unescape(text) for text in re.findall(r"[^<>]+", data.markup)
         )
         for elem in price_info_elements:
+            if not re.search(r"senior and student", elem, re.I):
+                continue
             match = re.search(r"\$(\d+)", elem)
             if match:
                 student_senior_price = match.group(1)
@@ -62,6 +62,8 @@ venue_translations = {
 
 
 class LincolnCenterParser(EventParser):
+    READY_SELECTOR = "h1.event-header__title"
+
     def parse_image_url(self, soup) -> tuple[str | None, str | None, str | None]:
         try:
             # https://res.cloudinary.com/nyphil/image/upload/c_fill%2Cg_auto%2Ch_1148
@@ -0,0 +1,112 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+
+import importer_globals as G
+from basic_utils import clean_up_url
+from EventParser import FETCH_MODE_BROWSER, EventParser
+from parser_common_code import parse_url_to_soup
+from prior_urls import read_prior_urls
+
+logger = logging.getLogger(__name__)
+
+
+class ListingCrawler:
+    """
+    Discovers event URLs from a parser's paginated listing.
+    Listing pages are fetched several at a time (the politeness scheduler still spaces out requests
+    to each host) and checked in page order. The crawl stops at the first page that meets the parser's
+    stop condition, by default a page whose events were all scraped in earlier runs, so a rerun that
+    finds nothing new reads only the first pages.
+    """
+
+    def __init__(self, parser: EventParser, prior_urls=()):
+        """
+        Args:
+            parser: Parser declaring the listing's URL template and link selector
+            prior_urls: URLs scraped in earlier runs
+        """
+        if not parser.LISTING_URL_TEMPLATE:
+            raise ValueError(f"{type(parser).__name__} has no listing URL template")
+        self.parser = parser
+        self.prior_urls = {clean_up_url(url) for url in prior_urls}
+        self.fetch_mode = parser.LISTING_FETCH_MODE or parser.FETCH_MODE
+        if self.fetch_mode == FETCH_MODE_BROWSER:
+            self.num_workers = G.SELENIUM_POOL_SIZE
+        else:
+            self.num_workers = G.HTTP_POOL_SIZE
+
+    def _read_page(self, page_number: int) -> list[str]:
+        """Return the event URLs linked from one listing page, in page order"""
+        page_url = self.parser.LISTING_URL_TEMPLATE.format(page=page_number)
+        logger.info(f"Reading listing page {page_url}")
+        soup = parse_url_to_soup(page_url, None, True, self.fetch_mode)
+        if not soup:
+            return []
+
+        urls = []
+        for link in soup.select(self.parser.LISTING_LINK_SELECTOR):
+            href = link.get("href")
+            if not href:
+                continue
+            url = clean_up_url(self.parser.clean_listing_url(urljoin(page_url, href)))
+            if url not in urls:
+                urls.append(url)
+        return urls
+
+    def crawl(self) -> list[str]:
+        """Return the event URLs found on the listing pages read before the stop condition was met"""
+        first_page = self.parser.LISTING_FIRST_PAGE
+        last_page = first_page + self.parser.LISTING_MAX_PAGES - 1
+        found_urls: dict[str, None] = {}  # Ordered set
+        num_pages_read = 0
+
+        with ThreadPoolExecutor(max_workers=self.num_workers) as executor:
+            page_number = first_page
+            stop = False
+            while not stop and page_number <= last_page:
+                # Read the next batch of pages at once, then check them in order
+                batch = range(
+                    page_number, min(page_number + self.num_workers, last_page + 1)
+                )
+                page_number = batch.stop
+                for page_urls in executor.map(self._read_page, batch):
+                    num_pages_read += 1
+                    new_urls = [
+                        url
+                        for url in page_urls
+                        if url not in self.prior_urls and url not in found_urls
+                    ]
+                    found_urls.update(dict.fromkeys(page_urls))
+                    if not page_urls or self.parser.is_last_listing_page(
+                        page_urls, new_urls
+                    ):
+                        stop = True
+                        break
+
+        num_new = len([url for url in found_urls if url not in self.prior_urls])
+        logger.info(
+            f"Read {num_pages_read} listing pages and found {len(found_urls)} event URLs, {num_new} of them new"
+        )
+        return list(found_urls)
+
+
+def crawl_listing_to_url_file(parser: EventParser, url_file_path: str) -> list[str]:
+    """
+    Crawl a parser's listing and write the event URLs found to its URL file.
+
+    Args:
+        parser: Parser declaring the listing
+        url_file_path: URL file; the URLs scraped in earlier runs are read from its prior-URL file
+
+    Returns:
+        The event URLs found
+    """
+    urls = ListingCrawler(parser, read_prior_urls(url_file_path)).crawl()
+
+    # Write the URLs out to a file for safekeeping
+    with open(url_file_path, "w", newline="\n") as url_file:
+        for url in urls:
+            url_file.write(url + "\n")
+
+    return urls
@@ -1,13 +1,23 @@
 import datetime as dt
-import json
 import os
 import re
 
-from EventParser import EventParser
-from parser_common_code import initialize_csv_dict, set_start_end_fields_from_start_dt
+from EventParser import FETCH_MODE_HTTP, EventParser
+from FetchedPage import any_class
+from parser_common_code import (
+    decode_json_ld,
+    initialize_csv_dict,
+    set_start_end_fields_from_start_dt,
+)
 
 
 class NationalSawdustParser(EventParser):
+    FETCH_MODE = FETCH_MODE_HTTP
+    # The event JSON is in a script
+    PARSE_ONLY = (
+        ("script", {}),
+        ("div", {"class": any_class("col-md-10", "event-about")}),
+    )
 
     def parse_soup_to_event(self, url, soup):
         # -----------------------------------
@@ -16,7 +26,7 @@ class NationalSawdustParser(EventParser):
         csv_dict = initialize_csv_dict(url)
 
         # Magic JSON with a lot of event info
-        event_json = json.loads(soup.find(text=re.compile("startDate")))[0]
+        event_json = decode_json_ld(soup.find(text=re.compile("startDate")))[0]
 
         # ----------------------------------------------------------------
         # Venue
@@ -2,7 +2,9 @@ import datetime as dt
 import logging
 import re
 
-from EventParser import EventParser
+from EventParser import FETCH_MODE_HTTP, EventParser
+from FetchedPage import any_class
+from IndexedSoup import strings_containing
 from parser_common_code import (
     initialize_csv_dict,
     set_start_end_fields_from_start_dt,
@@ -13,6 +15,17 @@ logger = logging.getLogger(__name__)
 
 
 class NjPacParser(EventParser):
+    FETCH_MODE = FETCH_MODE_HTTP
+    # Every span is kept, since the price is looked for in all of them
+    PARSE_ONLY = (
+        ("title", {}),
+        ("span", {}),
+        ("dl", {"class": any_class("event-details-list__performances")}),
+        ("div", {"class": any_class("event-single-content", "event_description")}),
+        ("meta", {"property": "og:image"}),
+    )
+    INDEXED_SOUP = True
+
     def parse_soup_to_event(self, url, soup):
         # -----------------------------------
         # Easy fields
@@ -118,15 +131,18 @@ class NjPacParser(EventParser):
         csv_dict["event_description"] = full_event_text
 
         # Price
-        # '$20 - $90'
+        # '$20 - $90', in the first span with a dollar sign in it
+        price_spans = [
+            s.find_parents("span")[-1]
+            for s in strings_containing(soup, "$")
+            if s.find_parent("span")
+        ]
         try:
-            price_str = str(
-                [s for s in soup.find_all("span") if "$" in str(s)][0].contents[0]
-            )
+            price_str = str(price_spans[0].contents[0])
         except Exception as ex:
             # Maybe the event is free
-            if [s for s in soup.find_all("span") if "FREE" in str(s)]:
-                price = 0
+            if any(s.find_parent("span") for s in strings_containing(soup, "FREE")):
+                csv_dict["event_cost"] = 0
         else:
             price_str = re.sub("[$ ]", "", price_str)
             csv_dict["event_cost"] = price_str
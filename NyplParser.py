@@ -1,10 +1,10 @@
 import datetime as dt
-import json
 import logging
 import re
 
 from EventParser import EventParser
 from parser_common_code import (
+    decode_json_ld,
     initialize_csv_dict,
     parse_event_tags,
     set_start_end_fields_from_start_dt,
@@ -38,9 +38,9 @@ class NyplParser(EventParser):
         json_element = twitter_tag.find_next_sibling(
             "script", attrs={"type": "application/ld+json"}
         )
-        json_parsed = json.loads(
-            json_element.contents[0].replace("\t", ""), strict=False
-        )
+        json_parsed = decode_json_ld(json_element.contents[0])
+        if json_parsed is None:
+            raise RuntimeError("Unable to decode the event JSON")
 
         # Check for repeating -- follow up manually
         try:
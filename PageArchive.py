@@ -0,0 +1,769 @@
+import json
+import logging
+import sqlite3
+import threading
+import typing
+from time import time
+
+from FetchedPage import (
+    ZSTD_AVAILABLE,
+    ZSTD_LEVEL,
+    FetchedPage,
+    compress_body,
+    decompress_body,
+)
+from page_text import extract_page_text
+
+if ZSTD_AVAILABLE:
+    import zstandard
+
+logger = logging.getLogger(__name__)
+
+# Orders pages can be iterated in
+ORDER_ARCHIVED = "archived"  # Order the pages were first archived in
+ORDER_FETCHED = "fetched"  # Fetch time
+ORDER_URL = "url"
+
+_ORDER_BY = {
+    ORDER_ARCHIVED: "id",
+    ORDER_FETCHED: "fetched_at, id",
+    ORDER_URL: "url",
+}
+
+# Versions of a URL's page stored as deltas before the next one is stored whole.
+# Rebuilding a version applies at most this many deltas.
+HISTORY_BASE_INTERVAL = 10
+
+_PAGE_COLUMNS = "url, body, compression, dictionary_id, content_type, status, headers, final_url, fetched_at"
+
+
+class PageArchive:
+    """
+    SQLite archive of fetched pages, one per venue, keyed by URL.
+    Bodies are stored compressed with their fetch metadata. Pages are indexed by fetch time and
+    content hash, and the number of pages is kept in a counter, so looking up a page, appending one
+    and counting them never scan the archive.
+
+    Pages from one venue share most of their markup, so when zstd is installed the archive trains a
+    zstd dictionary from a sample of its pages and compresses new pages with it. Dictionaries are
+    versioned: each page records the dictionary it was compressed with, and a retrained dictionary
+    is used only for pages stored after it.
+
+    Every version of a URL's page is kept. The latest is the stored page; when a changed page
+    replaces it, the copy it replaces is moved into the URL's history. A history version is stored
+    whole every HISTORY_BASE_INTERVAL versions; the versions in between are stored as zstd deltas
+    from the version before, with that version as the compression dictionary. Without zstd every
+    version is stored whole.
+
+    Each page's title, visible text and key attributes are kept in a full-text index, searched
+    with search().
+    """
+
+    def __init__(
+        self,
+        archive_path: str,
+        dictionary_min_pages: int = 0,
+        dictionary_retrain_pages: int = 0,
+        dictionary_size: int = 110 * 1024,
+    ):
+        """
+        Args:
+            archive_path: SQLite file holding the archive, created if missing
+            dictionary_min_pages: Pages stored before the first dictionary is trained; 0 to store
+                pages without dictionaries
+            dictionary_retrain_pages: Pages stored with a dictionary before a new one is trained;
+                0 to keep the first dictionary
+            dictionary_size: Size of a trained dictionary in bytes
+        """
+        self.archive_path = archive_path
+        self.dictionary_min_pages = dictionary_min_pages if ZSTD_AVAILABLE else 0
+        self.dictionary_retrain_pages = dictionary_retrain_pages
+        self.dictionary_size = dictionary_size
+        # Reentrant, since storing a page reads the copy it replaces
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(archive_path, check_same_thread=False)
+        # Appends are committed one page at a time
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                id INTEGER PRIMARY KEY,
+                url TEXT NOT NULL UNIQUE,
+                fetched_at REAL NOT NULL,
+                archived_at REAL NOT NULL,
+                content_hash TEXT NOT NULL,
+                status INTEGER,
+                content_type TEXT,
+                headers TEXT NOT NULL,
+                final_url TEXT,
+                compression TEXT NOT NULL,
+                body BLOB NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_fetched_at ON pages (fetched_at);
+            CREATE INDEX IF NOT EXISTS idx_content_hash ON pages (content_hash);
+
+            CREATE TABLE IF NOT EXISTS dictionaries (
+                id INTEGER PRIMARY KEY,
+                trained_at REAL NOT NULL,
+                trained_at_put INTEGER NOT NULL,
+                num_samples INTEGER NOT NULL,
+                data BLOB NOT NULL
+            );
+
+            CREATE TABLE IF NOT EXISTS page_versions (
+                url TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                base_version INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                content_hash TEXT NOT NULL,
+                status INTEGER,
+                content_type TEXT,
+                headers TEXT NOT NULL,
+                final_url TEXT,
+                compression TEXT NOT NULL,
+                dictionary_id INTEGER REFERENCES dictionaries (id),
+                body BLOB NOT NULL,
+                PRIMARY KEY (url, version)
+            );
+
+            CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+            INSERT OR IGNORE INTO counters VALUES ('pages', 0);
+            INSERT OR IGNORE INTO counters VALUES ('puts', 0);
+            CREATE TRIGGER IF NOT EXISTS count_insert AFTER INSERT ON pages
+                BEGIN UPDATE counters SET value = value + 1 WHERE name = 'pages'; END;
+            CREATE TRIGGER IF NOT EXISTS count_delete AFTER DELETE ON pages
+                BEGIN UPDATE counters SET value = value - 1 WHERE name = 'pages'; END;
+            """)
+        # Archives written before dictionaries were added
+        columns = [
+            row[1] for row in self._connection.execute("PRAGMA table_info(pages)")
+        ]
+        if "dictionary_id" not in columns:
+            self._connection.execute(
+                "ALTER TABLE pages ADD COLUMN dictionary_id INTEGER REFERENCES dictionaries (id)"
+            )
+        self._connection.commit()
+
+        # Full-text index of each page's title, visible text and key attributes, sharing the
+        # pages' row IDs. Hyphens and underscores are kept in tokens so class names match whole.
+        try:
+            self._connection.execute(
+                """CREATE VIRTUAL TABLE IF NOT EXISTS page_text USING fts5 (
+                    title, text, attributes, tokenize = "unicode61 tokenchars '-_'"
+                )"""
+            )
+            self._connection.commit()
+            self.searchable = True
+        except sqlite3.OperationalError as e:
+            logger.info(f"Page search is unavailable without SQLite FTS5: {e}")
+            self.searchable = False
+        self._index_checked = False
+
+        # Dictionaries are loaded as pages need them. New pages use the latest one.
+        self._dictionaries: dict[int, "zstandard.ZstdCompressionDict"] = {}
+        self._dictionary_id: int | None = None
+        self._trained_at_put = 0
+        self._compressor = None
+        # Training runs in one thread at a time, and after a failure waits for more pages
+        self._training = False
+        self._failed_training_put: int | None = None
+        # Decompressors aren't thread-safe, so each thread has its own
+        self._local = threading.local()
+        if ZSTD_AVAILABLE:
+            row = self._connection.execute(
+                "SELECT id, trained_at_put FROM dictionaries ORDER BY id DESC LIMIT 1"
+            ).fetchone()
+            if row:
+                self._use_dictionary(*row)
+
+    def _load_dictionary(self, dictionary_id: int) -> "zstandard.ZstdCompressionDict":
+        """Return a stored dictionary. Call with the lock held."""
+        if dictionary_id not in self._dictionaries:
+            (data,) = self._connection.execute(
+                "SELECT data FROM dictionaries WHERE id = ?", (dictionary_id,)
+            ).fetchone()
+            self._dictionaries[dictionary_id] = zstandard.ZstdCompressionDict(data)
+        return self._dictionaries[dictionary_id]
+
+    def _use_dictionary(self, dictionary_id: int, trained_at_put: int) -> None:
+        """Compress new pages with a stored dictionary. Call with the lock held."""
+        self._dictionary_id = dictionary_id
+        self._trained_at_put = trained_at_put
+        self._compressor = zstandard.ZstdCompressor(
+            level=ZSTD_LEVEL, dict_data=self._load_dictionary(dictionary_id)
+        )
+
+    def _compress(self, body: bytes) -> tuple[str, bytes, int | None]:
+        """Compress a body with the current dictionary, if there is one. Call with the lock held."""
+        if self._compressor is not None:
+            return "zstd", self._compressor.compress(body), self._dictionary_id
+        compression, data = compress_body(body)
+        return compression, data, None
+
+    def _decompress(
+        self, compression: str, data: bytes, dictionary_id: int | None
+    ) -> bytes:
+        if dictionary_id is None:
+            return decompress_body(compression, data)
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("Install zstandard to read pages archived with zstd")
+        decompressors = self._local.__dict__.setdefault("decompressors", {})
+        if dictionary_id not in decompressors:
+            with self._lock:
+                dictionary = self._load_dictionary(dictionary_id)
+            decompressors[dictionary_id] = zstandard.ZstdDecompressor(
+                dict_data=dictionary
+            )
+        return decompressors[dictionary_id].decompress(data)
+
+    @staticmethod
+    def _delta_dictionary(previous_body: bytes) -> "zstandard.ZstdCompressionDict":
+        """A dictionary of a version's raw content, which the next version is compressed against"""
+        return zstandard.ZstdCompressionDict(
+            previous_body, dict_type=zstandard.DICT_TYPE_RAWCONTENT
+        )
+
+    def _insert_version(
+        self,
+        page: FetchedPage,
+        version: int,
+        base_version: int,
+        compression: str,
+        data: bytes,
+        dictionary_id: int | None,
+    ) -> None:
+        self._connection.execute(
+            "INSERT INTO page_versions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                page.url,
+                version,
+                base_version,
+                page.fetched_at,
+                page.content_hash(),
+                page.status,
+                page.content_type,
+                json.dumps(page.headers),
+                page.final_url,
+                compression,
+                dictionary_id,
+                data,
+            ),
+        )
+
+    def _copy_to_history(self, url: str) -> None:
+        """
+        Copy a URL's stored page into its history whole, as the version after its last one,
+        without recompressing it. Call with the lock held.
+        """
+        self._connection.execute(
+            """INSERT INTO page_versions
+            SELECT url, version, version, fetched_at, content_hash, status, content_type, headers,
+                final_url, compression, dictionary_id, body
+            FROM (
+                SELECT pages.*, 1 + COALESCE(
+                    (SELECT MAX(version) FROM page_versions WHERE url = pages.url), 0
+                ) AS version
+                FROM pages WHERE url = ?
+            )""",
+            (url,),
+        )
+
+    def _last_version(self, url: str) -> tuple[int, int, str] | None:
+        """Return the version, base version and content hash of the last version in a URL's history"""
+        return self._connection.execute(
+            """SELECT version, base_version, content_hash FROM page_versions
+            WHERE url = ? ORDER BY version DESC LIMIT 1""",
+            (url,),
+        ).fetchone()
+
+    def _add_to_history(self, stored: FetchedPage) -> None:
+        """
+        Add the stored copy of a URL's page to its history, unless it is the same as the
+        history's last version. Call with the lock held.
+        """
+        last = self._last_version(stored.url)
+        if last is not None and last[2] == stored.content_hash():
+            return
+        if (
+            not ZSTD_AVAILABLE
+            or last is None
+            or last[0] + 1 - last[1] >= HISTORY_BASE_INTERVAL
+        ):
+            self._copy_to_history(stored.url)
+            return
+
+        last_body = self._build_version(stored.url, last[0])
+        delta = zstandard.ZstdCompressor(
+            level=ZSTD_LEVEL, dict_data=self._delta_dictionary(last_body)
+        ).compress(stored.body)
+        self._insert_version(stored, last[0] + 1, last[1], "zstd-delta", delta, None)
+
+    def _keep_replaced_version(
+        self, page: FetchedPage, previous: FetchedPage | None
+    ) -> None:
+        """
+        Move the stored copy of a URL's page into its history, if the page replacing it has
+        changed. Call with the lock held.
+        """
+        if previous is None:
+            # A page deleted by clear() is the last version in its history. If it comes back
+            # unchanged, it is the stored page again rather than a second copy of that version.
+            last = self._last_version(page.url)
+            if last is not None and last[2] == page.content_hash():
+                self._connection.execute(
+                    "DELETE FROM page_versions WHERE url = ? AND version = ?",
+                    (page.url, last[0]),
+                )
+            return
+        if previous.content_hash() != page.content_hash():
+            self._add_to_history(previous)
+
+    def put(self, page: FetchedPage) -> None:
+        """Store a page, replacing any earlier copy of its URL. Changed pages are added to its history."""
+        page_text = self._extract_text(page) if self.searchable else None
+        with self._lock:
+            self._keep_replaced_version(page, self._select_page(page.url))
+            compression, data, dictionary_id = self._compress(page.body)
+            self._connection.execute(
+                """INSERT INTO pages (url, fetched_at, archived_at, content_hash, status, content_type,
+                    headers, final_url, compression, body, dictionary_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (url) DO UPDATE SET
+                    fetched_at = excluded.fetched_at,
+                    archived_at = excluded.archived_at,
+                    content_hash = excluded.content_hash,
+                    status = excluded.status,
+                    content_type = excluded.content_type,
+                    headers = excluded.headers,
+                    final_url = excluded.final_url,
+                    compression = excluded.compression,
+                    body = excluded.body,
+                    dictionary_id = excluded.dictionary_id""",
+                (
+                    page.url,
+                    page.fetched_at,
+                    time(),
+                    page.content_hash(),
+                    page.status,
+                    page.content_type,
+                    json.dumps(page.headers),
+                    page.final_url,
+                    compression,
+                    data,
+                    dictionary_id,
+                ),
+            )
+            self._connection.execute(
+                "UPDATE counters SET value = value + 1 WHERE name = 'puts'"
+            )
+            if page_text is not None:
+                (page_id,) = self._connection.execute(
+                    "SELECT id FROM pages WHERE url = ?", (page.url,)
+                ).fetchone()
+                self._index_text(page_id, page_text)
+            self._connection.commit()
+            train = self._should_train()
+            if train:
+                self._training = True
+
+        if train:
+            try:
+                self.train_dictionary()
+            finally:
+                with self._lock:
+                    self._training = False
+
+    @staticmethod
+    def _extract_text(page: FetchedPage) -> tuple[str, str, str]:
+        try:
+            return extract_page_text(page.body, page.content_type)
+        except Exception as e:
+            logger.info(f"Unable to extract the text of {page.url}: {e}")
+            return "", "", ""
+
+    def _index_text(self, page_id: int, page_text: tuple[str, str, str]) -> None:
+        """Replace a page's full-text index entry. Call with the lock held."""
+        self._connection.execute("DELETE FROM page_text WHERE rowid = ?", (page_id,))
+        self._connection.execute(
+            "INSERT INTO page_text (rowid, title, text, attributes) VALUES (?, ?, ?, ?)",
+            (page_id, *page_text),
+        )
+
+    def _index_unindexed_pages(self) -> None:
+        """Index the pages stored before the archive had a full-text index"""
+        with self._lock:
+            urls = [
+                url
+                for (url,) in self._connection.execute(
+                    "SELECT url FROM pages WHERE id NOT IN (SELECT rowid FROM page_text)"
+                )
+            ]
+        for url in urls:
+            page = self.get(url)
+            if page is None:
+                continue
+            page_text = self._extract_text(page)
+            with self._lock:
+                row = self._connection.execute(
+                    "SELECT id FROM pages WHERE url = ?", (url,)
+                ).fetchone()
+                if row:
+                    self._index_text(row[0], page_text)
+                    self._connection.commit()
+        if urls:
+            logger.info(f"Indexed the text of {len(urls)} pages in {self.archive_path}")
+
+    def search(
+        self,
+        phrase: str | None = None,
+        match: str | None = None,
+        fetched_after: float | None = None,
+        fetched_before: float | None = None,
+    ) -> list[str]:
+        """
+        Return the URLs of the pages matching a text search and fetch-time range, best matches first.
+        The URLs can be passed to parse_pages_to_events to parse only those pages.
+
+        Args:
+            phrase: Text the page's title, visible text or key attributes (e.g., a class name)
+                must contain
+            match: FTS5 query, e.g., 'text:recital AND attributes:"event-title"'
+            fetched_after: Earliest fetch time, in seconds since the epoch
+            fetched_before: Fetch time the pages were fetched before, in seconds since the epoch
+        """
+        conditions = []
+        parameters: list = []
+        queries = []
+        if phrase:
+            queries.append('"' + phrase.replace('"', '""') + '"')
+        if match:
+            queries.append(f"({match})")
+        if fetched_after is not None:
+            conditions.append("pages.fetched_at >= ?")
+            parameters.append(fetched_after)
+        if fetched_before is not None:
+            conditions.append("pages.fetched_at < ?")
+            parameters.append(fetched_before)
+
+        if not queries:
+            where = " AND ".join(conditions) or "1"
+            with self._lock:
+                return [
+                    url
+                    for (url,) in self._connection.execute(
+                        f"SELECT url FROM pages WHERE {where} ORDER BY fetched_at, id",
+                        parameters,
+                    )
+                ]
+
+        if not self.searchable:
+            raise RuntimeError("Page search needs SQLite with FTS5")
+        if not self._index_checked:
+            self._index_unindexed_pages()
+            self._index_checked = True
+        conditions.insert(0, "page_text MATCH ?")
+        parameters.insert(0, " AND ".join(queries))
+        with self._lock:
+            return [
+                url
+                for (url,) in self._connection.execute(
+                    f"""SELECT pages.url FROM page_text JOIN pages ON pages.id = page_text.rowid
+                    WHERE {" AND ".join(conditions)} ORDER BY page_text.rank""",
+                    parameters,
+                )
+            ]
+
+    def _num_puts(self) -> int:
+        with self._lock:
+            return self._connection.execute(
+                "SELECT value FROM counters WHERE name = 'puts'"
+            ).fetchone()[0]
+
+    def _should_train(self) -> bool:
+        """
+        Whether enough pages have been stored for a first or a retrained dictionary, and, if
+        training last failed, for another try. Call with the lock held.
+        """
+        if not self.dictionary_min_pages or self._training:
+            return False
+        if self._dictionary_id is None:
+            pages_between_tries = self.dictionary_min_pages
+            ready = self.count() >= self.dictionary_min_pages
+        else:
+            pages_between_tries = self.dictionary_retrain_pages
+            ready = bool(
+                self.dictionary_retrain_pages
+                and self._num_puts() - self._trained_at_put
+                >= self.dictionary_retrain_pages
+            )
+        if ready and self._failed_training_put is not None:
+            ready = self._num_puts() - self._failed_training_put >= pages_between_tries
+        return ready
+
+    def train_dictionary(self, num_samples: int = 500) -> int | None:
+        """
+        Train a dictionary from the most recently archived pages and compress new pages with it.
+        Pages stored without a dictionary are recompressed with it; pages compressed with an earlier
+        dictionary keep it.
+
+        Args:
+            num_samples: Most pages to train from
+
+        Returns:
+            The new dictionary's ID, or None if zstd isn't installed or the pages were too few
+        """
+        if not ZSTD_AVAILABLE:
+            return None
+        with self._lock:
+            sample_urls = [
+                url
+                for (url,) in self._connection.execute(
+                    "SELECT url FROM pages ORDER BY archived_at DESC LIMIT ?",
+                    (num_samples,),
+                )
+            ]
+        samples = [page.body for url in sample_urls if (page := self.get(url))]
+        try:
+            dictionary = zstandard.train_dictionary(self.dictionary_size, samples)
+        except zstandard.ZstdError as e:
+            logger.info(f"Unable to train a dictionary from {len(samples)} pages: {e}")
+            with self._lock:
+                self._failed_training_put = self._num_puts()
+            return None
+
+        num_puts = self._num_puts()
+        with self._lock:
+            dictionary_id = self._connection.execute(
+                "INSERT INTO dictionaries (trained_at, trained_at_put, num_samples, data) VALUES (?, ?, ?, ?)",
+                (time(), num_puts, len(samples), dictionary.as_bytes()),
+            ).lastrowid
+            self._connection.commit()
+            self._use_dictionary(dictionary_id, num_puts)
+            self._failed_training_put = None
+        logger.info(
+            f"Trained dictionary {dictionary_id} for {self.archive_path} from {len(samples)} pages"
+        )
+
+        self._recompress_without_dictionary()
+        return dictionary_id
+
+    def _recompress_without_dictionary(self) -> None:
+        """Recompress the pages stored without a dictionary with the current one"""
+        with self._lock:
+            ids = [
+                page_id
+                for (page_id,) in self._connection.execute(
+                    "SELECT id FROM pages WHERE dictionary_id IS NULL"
+                )
+            ]
+        for page_id in ids:
+            with self._lock:
+                row = self._connection.execute(
+                    "SELECT compression, body FROM pages WHERE id = ? AND dictionary_id IS NULL",
+                    (page_id,),
+                ).fetchone()
+                if row is None:
+                    continue
+                body = decompress_body(*row)
+                compression, data, dictionary_id = self._compress(body)
+                self._connection.execute(
+                    "UPDATE pages SET compression = ?, body = ?, dictionary_id = ? WHERE id = ?",
+                    (compression, data, dictionary_id, page_id),
+                )
+                self._connection.commit()
+        if ids:
+            logger.info(
+                f"Recompressed {len(ids)} pages with dictionary {self._dictionary_id}"
+            )
+
+    def _select_page(self, url: str) -> FetchedPage | None:
+        with self._lock:
+            row = self._connection.execute(
+                f"SELECT {_PAGE_COLUMNS} FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return self._page_from_row(row)
+
+    def _page_from_row(self, row: tuple, body: bytes | None = None) -> FetchedPage:
+        """Return the page in a row of _PAGE_COLUMNS, decompressing its body unless it is given"""
+        (
+            url,
+            data,
+            compression,
+            dictionary_id,
+            content_type,
+            status,
+            headers,
+            final_url,
+            fetched_at,
+        ) = row
+        if body is None:
+            body = self._decompress(compression, data, dictionary_id)
+        return FetchedPage(
+            url,
+            body,
+            content_type,
+            status,
+            json.loads(headers),
+            final_url,
+            fetched_at,
+        )
+
+    def get(self, url: str) -> FetchedPage | None:
+        """Return the archived page for a URL, or None if there is none"""
+        return self._select_page(url)
+
+    def versions(self, url: str) -> list[tuple[int, float, str]]:
+        """
+        Return the version number, fetch time and content hash of each version of a URL's page,
+        oldest first. The last is the stored page.
+        """
+        with self._lock:
+            versions = self._connection.execute(
+                """SELECT version, fetched_at, content_hash FROM page_versions
+                WHERE url = ? ORDER BY version""",
+                (url,),
+            ).fetchall()
+            stored = self._connection.execute(
+                "SELECT fetched_at, content_hash FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+        if stored is not None:
+            versions.append((len(versions) + 1, *stored))
+        return versions
+
+    def _build_version(self, url: str, version: int) -> bytes | None:
+        """
+        Return the body of a history version, from the version stored whole before it and the
+        deltas after that one. Call with the lock held.
+        """
+        rows = self._connection.execute(
+            """SELECT compression, dictionary_id, body FROM page_versions
+            WHERE url = ? AND version <= ? AND version >= (
+                SELECT base_version FROM page_versions WHERE url = ? AND version = ?
+            )
+            ORDER BY version""",
+            (url, version, url, version),
+        ).fetchall()
+        body = None
+        for compression, dictionary_id, data in rows:
+            if compression == "zstd-delta":
+                if not ZSTD_AVAILABLE:
+                    raise RuntimeError(
+                        "Install zstandard to read page versions stored as deltas"
+                    )
+                body = zstandard.ZstdDecompressor(
+                    dict_data=self._delta_dictionary(body)
+                ).decompress(data)
+            else:
+                body = self._decompress(compression, data, dictionary_id)
+        return body
+
+    def get_version(self, url: str, version: int) -> FetchedPage | None:
+        """
+        Rebuild a version of a URL's page, e.g., the last one that parsed, when the live page is broken.
+
+        Args:
+            url: URL of the page
+            version: Version number from versions(); negative numbers count back from the latest
+
+        Returns:
+            The page as it was fetched, or None if there is no such version
+        """
+        with self._lock:
+            (last_version,) = self._connection.execute(
+                "SELECT COALESCE(MAX(version), 0) FROM page_versions WHERE url = ?",
+                (url,),
+            ).fetchone()
+            # The version after the history is the stored page
+            if version < 0:
+                version += last_version + 2
+            if version == last_version + 1:
+                return self._select_page(url)
+
+            row = self._connection.execute(
+                f"SELECT {_PAGE_COLUMNS} FROM page_versions WHERE url = ? AND version = ?",
+                (url, version),
+            ).fetchone()
+            if row is None:
+                return None
+            return self._page_from_row(row, self._build_version(url, version))
+
+    def __contains__(self, url: str) -> bool:
+        with self._lock:
+            return (
+                self._connection.execute(
+                    "SELECT 1 FROM pages WHERE url = ?", (url,)
+                ).fetchone()
+                is not None
+            )
+
+    def count(self) -> int:
+        """Return the number of archived pages"""
+        with self._lock:
+            return self._connection.execute(
+                "SELECT value FROM counters WHERE name = 'pages'"
+            ).fetchone()[0]
+
+    def urls(self, order: str = ORDER_ARCHIVED) -> list[str]:
+        """Return the archived URLs in the given order"""
+        with self._lock:
+            return [
+                url
+                for (url,) in self._connection.execute(
+                    f"SELECT url FROM pages ORDER BY {_ORDER_BY[order]}"
+                )
+            ]
+
+    def last_url(self) -> str | None:
+        """Return the most recently archived URL"""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT url FROM pages ORDER BY archived_at DESC, id DESC LIMIT 1"
+            ).fetchone()
+        return row[0] if row else None
+
+    def urls_with_hash(self, content_hash: str) -> list[str]:
+        """Return the URLs whose pages have the given SHA-256 content hash"""
+        with self._lock:
+            return [
+                url
+                for (url,) in self._connection.execute(
+                    "SELECT url FROM pages WHERE content_hash = ?", (content_hash,)
+                )
+            ]
+
+    def pages(self, order: str = ORDER_ARCHIVED) -> typing.Iterator[FetchedPage]:
+        """
+        Yield the archived pages in the given order.
+        The URLs are read up front and each page is looked up as it is needed, so the archive can
+        be appended to while it is being iterated.
+        """
+        for url in self.urls(order):
+            page = self.get(url)
+            if page is not None:
+                yield page
+
+    def clear(self) -> None:
+        """
+        Delete every page. Their histories are kept, ending with the deleted pages, which are
+        stored like any replaced page: as deltas, and not at all if the history already ends
+        with them.
+        """
+        for url in self.urls():
+            with self._lock:
+                stored = self._select_page(url)
+                if stored is not None:
+                    self._add_to_history(stored)
+                    self._connection.commit()
+        with self._lock:
+            self._connection.execute("DELETE FROM pages")
+            if self.searchable:
+                self._connection.execute("DELETE FROM page_text")
+            self._connection.commit()
+        with self._lock:
+            self._connection.execute("VACUUM")
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,267 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from time import time
+
+from basic_utils import canonicalize_url
+from EventParser import FETCH_MODE_HTTP
+from FetchedPage import FetchedPage
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedPage:
+    """A page stored in the page cache, with the validators it was served with"""
+
+    url: str
+    body: bytes
+    content_type: str | None
+    etag: str | None
+    last_modified: str | None
+    status: int | None = None
+    headers: dict[str, str] = field(default_factory=dict)
+    final_url: str | None = None
+
+    def fetched_page(self, url: str) -> FetchedPage:
+        """Return the cached page as it was first read, for a URL found not to have changed"""
+        return FetchedPage(
+            url,
+            self.body,
+            self.content_type,
+            self.status,
+            self.headers,
+            self.final_url,
+        )
+
+
+class PageCache:
+    """
+    On-disk HTTP cache keyed by fetch mode and canonical URL, so a page rendered in the browser
+    and the same page as the server sent it are cached apart.
+    Entries are revalidated with If-None-Match / If-Modified-Since, so an unchanged page
+    costs a 304 response instead of a full download. The cache is bounded in size, evicting
+    the least recently used entries first.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        """
+        Args:
+            cache_dir: Directory holding the index database and the cached bodies
+            max_bytes: Total size of cached bodies above which entries are evicted
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            self.cache_dir / "index.sqlite", check_same_thread=False
+        )
+        self._connection.execute("""CREATE TABLE IF NOT EXISTS entries (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content_type TEXT,
+                body_file TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL,
+                status INTEGER,
+                headers TEXT,
+                final_url TEXT
+            )""")
+        # Caches written before pages' fetch metadata was stored
+        columns = [
+            row[1] for row in self._connection.execute("PRAGMA table_info(entries)")
+        ]
+        for column in ("status INTEGER", "headers TEXT", "final_url TEXT"):
+            if column.split()[0] not in columns:
+                self._connection.execute(f"ALTER TABLE entries ADD COLUMN {column}")
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS idx_last_access ON entries (last_access)"
+        )
+        self._connection.commit()
+
+        # Counters
+        self.hits = 0  # Served from disk after a 304
+        self.misses = 0  # Nothing usable in the cache
+        self.revalidations = 0  # Conditional requests sent
+        self.evictions = 0
+
+    @staticmethod
+    def _key(url: str, fetch_mode: str) -> str:
+        return f"{fetch_mode} {canonicalize_url(url)}"
+
+    def lookup(self, url: str, fetch_mode: str = FETCH_MODE_HTTP) -> CachedPage | None:
+        """Return the cached page for a URL read in a fetch mode, or None if there is none"""
+        key = self._key(url, fetch_mode)
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT etag, last_modified, content_type, body_file, status, headers, final_url"
+                " FROM entries WHERE url = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None
+
+        etag, last_modified, content_type, body_file, status, headers, final_url = row
+        try:
+            body = (self.cache_dir / body_file).read_bytes()
+        except FileNotFoundError:
+            self._delete(key)
+            return None
+
+        return CachedPage(
+            canonicalize_url(url),
+            body,
+            content_type,
+            etag,
+            last_modified,
+            status,
+            json.loads(headers) if headers else {},
+            final_url,
+        )
+
+    @staticmethod
+    def conditional_headers(cached_page: CachedPage | None) -> dict[str, str]:
+        """Return the request headers that revalidate a cached page"""
+        headers = {}
+        if cached_page is not None:
+            if cached_page.etag:
+                headers["If-None-Match"] = cached_page.etag
+            if cached_page.last_modified:
+                headers["If-Modified-Since"] = cached_page.last_modified
+        return headers
+
+    def store(
+        self,
+        page: FetchedPage,
+        fetch_mode: str = FETCH_MODE_HTTP,
+        validators: dict[str, str] | None = None,
+    ) -> None:
+        """
+        Store a page if the server sent validators for it. A page whose validators were read
+        separately is stored even without any, as a record that it can't be revalidated.
+
+        Args:
+            page: Page as it was read
+            fetch_mode: How the page was read, e.g., FETCH_MODE_BROWSER for a rendered page
+            validators: Headers of a separate response holding the page's ETag and
+                Last-Modified, for a page whose own headers don't have them
+        """
+        validator_headers = {
+            k.lower(): v
+            for k, v in (page.headers if validators is None else validators).items()
+        }
+        etag = validator_headers.get("etag")
+        last_modified = validator_headers.get("last-modified")
+        if validators is None and not (etag or last_modified):
+            return
+        body = page.body
+        if len(body) > self.max_bytes:
+            return
+
+        key = self._key(page.url, fetch_mode)
+        body_file = hashlib.sha1(key.encode("utf-8")).hexdigest() + ".body"
+        temp_path = self.cache_dir / f"{body_file}.{threading.get_ident()}.tmp"
+        temp_path.write_bytes(body)
+        os.replace(temp_path, self.cache_dir / body_file)
+
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    etag,
+                    last_modified,
+                    page.content_type,
+                    body_file,
+                    len(body),
+                    time(),
+                    page.status,
+                    json.dumps(page.headers),
+                    page.final_url,
+                ),
+            )
+            self._connection.commit()
+        self._evict()
+
+    def touch(self, url: str, fetch_mode: str = FETCH_MODE_HTTP, headers=None) -> None:
+        """
+        Mark a cached page as recently used.
+
+        Args:
+            url: URL of the page
+            fetch_mode: How the page was read
+            headers: Headers of a 304 response (case-insensitive mapping), whose ETag and
+                Last-Modified replace the cached page's
+        """
+        headers = headers or {}
+        with self._lock:
+            self._connection.execute(
+                "UPDATE entries SET last_access = ?, etag = COALESCE(?, etag),"
+                " last_modified = COALESCE(?, last_modified) WHERE url = ?",
+                (
+                    time(),
+                    headers.get("ETag"),
+                    headers.get("Last-Modified"),
+                    self._key(url, fetch_mode),
+                ),
+            )
+            self._connection.commit()
+
+    def _delete(self, key: str) -> None:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT body_file FROM entries WHERE url = ?", (key,)
+            ).fetchone()
+            self._connection.execute("DELETE FROM entries WHERE url = ?", (key,))
+            self._connection.commit()
+        if row:
+            (self.cache_dir / row[0]).unlink(missing_ok=True)
+
+    def _evict(self) -> None:
+        """Remove least recently used entries until the cache fits in its size limit"""
+        with self._lock:
+            total_bytes = self._connection.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()[0]
+            if total_bytes <= self.max_bytes:
+                return
+
+            evicted_files = []
+            for url, body_file, size in self._connection.execute(
+                "SELECT url, body_file, size FROM entries ORDER BY last_access"
+            ).fetchall():
+                if total_bytes <= self.max_bytes:
+                    break
+                self._connection.execute("DELETE FROM entries WHERE url = ?", (url,))
+                evicted_files.append(body_file)
+                total_bytes -= size
+                self.evictions += 1
+            self._connection.commit()
+
+        for body_file in evicted_files:
+            (self.cache_dir / body_file).unlink(missing_ok=True)
+
+    def increment(self, counter: str) -> None:
+        """Add one to a counter ("hits", "misses", "revalidations")"""
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def stats(self) -> dict:
+        """Return the cache counters"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "evictions": self.evictions,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
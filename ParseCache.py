@@ -0,0 +1,197 @@
+import hashlib
+import logging
+import pickle
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+from time import time
+from types import ModuleType
+
+from FetchedPage import FetchedPage, resolve_parser_backend
+
+logger = logging.getLogger(__name__)
+
+# Modules of shared parsing helpers, whose source is part of every parser's fingerprint
+SHARED_PARSING_MODULES = ("parser_common_code", "IndexedSoup")
+
+# Longest wait for another process's write to the cache to finish
+BUSY_TIMEOUT_SECONDS = 30.0
+
+# Directory of the importer's own modules. Only their source goes into fingerprints.
+SOURCE_DIRECTORY = Path(__file__).resolve().parent
+
+
+def _is_importer_module(module) -> bool:
+    """Whether a module is one of the importer's own, as opposed to the standard library or a package"""
+    module_file = getattr(module, "__file__", None)
+    return bool(module_file) and Path(module_file).resolve().parent == SOURCE_DIRECTORY
+
+
+def _modules_used(module_names) -> list[ModuleType]:
+    """
+    Return the named importer modules and every importer module they use, directly or through
+    another, found from the modules, functions and classes in each module's namespace
+    """
+    found: dict[str, ModuleType] = {}
+    pending = list(module_names)
+    while pending:
+        module_name = pending.pop()
+        module = sys.modules.get(module_name)
+        # A script's module changes with the script run, so it isn't followed
+        if (
+            module_name in found
+            or module_name == "__main__"
+            or not _is_importer_module(module)
+        ):
+            continue
+        found[module_name] = module
+        for value in vars(module).values():
+            if isinstance(value, ModuleType):
+                pending.append(value.__name__)
+            elif isinstance(getattr(value, "__module__", None), str):
+                pending.append(value.__module__)
+    return [found[module_name] for module_name in sorted(found)]
+
+
+def parser_fingerprint(parser) -> str:
+    """
+    Return a hash of the source of a parser's module, the modules of the classes it inherits from,
+    the shared parsing helpers and every importer module those use (basic_utils, importer_globals,
+    ...), and of the backend its pages are parsed with, so any change to the code that parses a
+    page changes it
+    """
+    module_names = [cls.__module__ for cls in type(parser).__mro__ if cls is not object]
+    module_names += SHARED_PARSING_MODULES
+    digest = hashlib.sha256(
+        resolve_parser_backend(getattr(parser, "HTML_PARSER_BACKEND", None)).encode()
+    )
+    for module in _modules_used(module_names):
+        module_file = Path(module.__file__)
+        if module_file.is_file():
+            digest.update(module_file.read_bytes())
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """
+    On-disk cache of parse results, keyed by page content hash, URL and parser fingerprint.
+    A page that hasn't changed, parsed by a parser whose code hasn't changed, gets its event row (or
+    the record that it had no event) back without being parsed again. Results from earlier versions
+    of a parser are deleted the first time its current version is used.
+    """
+
+    def __init__(self, cache_file: str):
+        """
+        Args:
+            cache_file: SQLite file holding the results, created if missing
+        """
+        self._lock = threading.Lock()
+        # Parse worker processes share the file, so readers don't wait for writers and writers
+        # wait for each other
+        self._connection = sqlite3.connect(
+            cache_file, timeout=BUSY_TIMEOUT_SECONDS, check_same_thread=False
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("""CREATE TABLE IF NOT EXISTS results (
+                content_hash TEXT NOT NULL,
+                url TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                parser TEXT NOT NULL,
+                event_row BLOB,
+                stored_at REAL NOT NULL,
+                PRIMARY KEY (content_hash, url, fingerprint)
+            )""")
+        self._connection.commit()
+        self._fingerprints: dict[type, str] = {}
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+
+    def _fingerprint(self, parser) -> str:
+        """Return the parser's fingerprint, dropping results from its earlier versions on first use"""
+        parser_class = type(parser)
+        with self._lock:
+            if parser_class not in self._fingerprints:
+                fingerprint = parser_fingerprint(parser)
+                self._fingerprints[parser_class] = fingerprint
+                try:
+                    deleted = self._connection.execute(
+                        "DELETE FROM results WHERE parser = ? AND fingerprint != ?",
+                        (parser_class.__name__, fingerprint),
+                    ).rowcount
+                    self._connection.commit()
+                except sqlite3.Error as e:
+                    # They are dropped by a later run
+                    logger.info(
+                        f"Couldn't drop parse results from earlier versions of {parser_class.__name__}: {e}"
+                    )
+                    self._connection.rollback()
+                    deleted = 0
+                if deleted:
+                    logger.info(
+                        f"Dropped {deleted} parse results from earlier versions of {parser_class.__name__}"
+                    )
+            return self._fingerprints[parser_class]
+
+    def lookup(self, page: FetchedPage, parser) -> tuple[bool, dict | None]:
+        """
+        Return whether the page has a stored result for this version of the parser, and the
+        event row parsed from it (None if the page had no event)
+        """
+        fingerprint = self._fingerprint(parser)
+        with self._lock:
+            try:
+                row = self._connection.execute(
+                    "SELECT event_row FROM results WHERE content_hash = ? AND url = ? AND fingerprint = ?",
+                    (page.content_hash(), page.url, fingerprint),
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.info(f"Couldn't look up the parse of {page.url}: {e}")
+                row = None
+            if row is None:
+                self.misses += 1
+                return False, None
+            self.hits += 1
+
+        # Unpickled fresh each time, so callers are free to change the row
+        return True, pickle.loads(row[0]) if row[0] is not None else None
+
+    def store(self, page: FetchedPage, parser, event_row: dict | None) -> None:
+        """
+        Store the event row parsed from a page, or None if the page had no event. Only store None
+        for parsers whose rejections depend on nothing but the page. A failed write is logged, and
+        the page is parsed again next time.
+        """
+        fingerprint = self._fingerprint(parser)
+        try:
+            data = pickle.dumps(event_row) if event_row is not None else None
+        except Exception as e:
+            logger.info(f"Not caching the parse of {page.url}: {e}")
+            return
+        with self._lock:
+            try:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        page.content_hash(),
+                        page.url,
+                        fingerprint,
+                        type(parser).__name__,
+                        data,
+                        time(),
+                    ),
+                )
+                self._connection.commit()
+            except sqlite3.Error as e:
+                logger.info(f"Not caching the parse of {page.url}: {e}")
+                self._connection.rollback()
+
+    def stats(self) -> dict:
+        """Return the cache counters"""
+        return {"hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
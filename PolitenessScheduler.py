@@ -0,0 +1,98 @@
+import logging
+import random
+import threading
+from time import monotonic, sleep
+from urllib.parse import urlparse
+
+import importer_globals as G
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Token bucket that spaces out requests to one host"""
+
+    def __init__(self, seconds_per_token: float, burst: int = 1, jitter: float = 0.5):
+        """
+        Args:
+            seconds_per_token: Average number of seconds between requests once the burst is used up
+            burst: Number of requests that may go out back to back
+            jitter: Each request costs a random amount of tokens in [1 - jitter, 1 + jitter], so
+                request times don't look mechanical
+        """
+        self.seconds_per_token = seconds_per_token
+        self.burst = max(1, burst)
+        self.jitter = jitter
+        self._tokens = float(self.burst)
+        self._last_refill = monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Reserve the next token and return how many seconds the caller must wait before using it.
+        Tokens may go negative, which queues later callers behind earlier ones.
+        """
+        with self._lock:
+            now = monotonic()
+            if self.seconds_per_token > 0:
+                self._tokens = min(
+                    self.burst,
+                    self._tokens + (now - self._last_refill) / self.seconds_per_token,
+                )
+            else:
+                self._tokens = self.burst
+            self._last_refill = now
+
+            cost = random.triangular(1 - self.jitter, 1 + self.jitter, 1)
+            seconds_to_wait = 0.0
+            if self._tokens < 1:
+                seconds_to_wait = (1 - self._tokens) * self.seconds_per_token
+            self._tokens -= cost
+
+        return seconds_to_wait
+
+
+class PolitenessScheduler:
+    """
+    Per-host politeness: requests to one host are spaced by that host's token bucket,
+    while requests to different hosts proceed concurrently.
+    """
+
+    def __init__(self):
+        self._buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def configure_host(self, host: str, seconds_per_request: float, burst: int = 1):
+        """Set the request rate and burst for a host, replacing any earlier, different setting"""
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if (
+                bucket is not None
+                and bucket.seconds_per_token == seconds_per_request
+                and bucket.burst == max(1, burst)
+            ):
+                return
+            self._buckets[host] = TokenBucket(seconds_per_request, burst)
+        logger.info(
+            f"Politeness for {host}: one request per {seconds_per_request} seconds, burst {burst}"
+        )
+
+    def _bucket_for_host(self, host: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                # Unknown hosts get the global defaults
+                bucket = self._buckets[host] = TokenBucket(
+                    G.SECONDS_TO_WAIT_BETWEEN_URL_READS, G.POLITENESS_BURST
+                )
+        return bucket
+
+    def wait_for_turn(self, url: str):
+        """Block until a request to the URL's host may start"""
+        host = urlparse(url).netloc
+        seconds_to_wait = self._bucket_for_host(host).reserve()
+        if seconds_to_wait > 0:
+            logger.info(
+                f"Waiting {seconds_to_wait:1f} seconds before reading from {host}"
+            )
+            sleep(seconds_to_wait)
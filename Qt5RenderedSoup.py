@@ -1,39 +1,204 @@
 import logging
+import queue
 import sys
+import threading
 from multiprocessing import Process, Queue
+from time import monotonic
 
-import bs4 as bs
-from PyQt5.QtCore import QUrl
-from PyQt5.QtWebEngineWidgets import QWebEnginePage
-from PyQt5.QtWidgets import QApplication
+from FetchedPage import HTML_UTF8, FetchedPage, make_soup
 
 logger = logging.getLogger(__name__)
 
-g_app = None
+g_render_worker = None
 
 
-class Qt5WebPage(QWebEnginePage):
+def _render_pages(
+    request_queue: Queue, response_queue: Queue, profile_path: str | None
+):
     """
-    https://stackoverflow.com/questions/42147601/pyqt4-to-pyqt5-mainframe-deprecated-need-fix-to-load-web-pages
+    Body of the renderer subprocess. Starts WebEngine once and renders each URL taken from the
+    request queue with the same page and profile, until it reads None.
     """
+    # Qt is only imported in the subprocess
+    from PyQt5.QtCore import QEventLoop, QUrl
+    from PyQt5.QtWebEngineWidgets import QWebEnginePage, QWebEngineProfile
+    from PyQt5.QtWidgets import QApplication
 
-    def __init__(self, url):
-        global g_app
-        if not g_app:
-            g_app = QApplication(sys.argv)
-        QWebEnginePage.__init__(self)
-        self.html = ""
-        self.loadFinished.connect(self.on_load_finished)
-        self.load(QUrl(url))
-        g_app.exec_()
+    app = QApplication(sys.argv)
+    if profile_path:
+        # Cookies and cache persist between runs
+        profile = QWebEngineProfile("pianyc", app)
+        profile.setPersistentStoragePath(profile_path)
+        profile.setCachePath(profile_path)
+    else:
+        profile = QWebEngineProfile.defaultProfile()
+    page = QWebEnginePage(profile, app)
+
+    while True:
+        request = request_queue.get()
+        if request is None:
+            break
+        request_id, url = request
+
+        result = {"ok": False, "html": ""}
+        loop = QEventLoop()
+
+        def marshal_results(html_str):
+            result["html"] = html_str
+            loop.quit()
+
+        def on_load_finished(ok):
+            result["ok"] = ok
+            page.toHtml(marshal_results)
+
+        page.loadFinished.connect(on_load_finished)
+        page.load(QUrl(url))
+        loop.exec_()
+        page.loadFinished.disconnect(on_load_finished)
+
+        if result["ok"]:
+            response_queue.put((request_id, result["html"], None))
+        else:
+            response_queue.put((request_id, None, f"Load failed for {url}"))
+
+    app.quit()
+
+
+class Qt5RenderWorker:
+    """
+    A long-lived Qt WebEngine renderer in a subprocess, so WebEngine starts once per run
+    rather than once per page. Requests go through a queue; a renderer that hangs past the
+    timeout or crashes is killed and started again.
+    """
+
+    def __init__(
+        self,
+        timeout_seconds: float = 60.0,
+        max_restarts: int = 3,
+        profile_path: str | None = None,
+    ):
+        """
+        Args:
+            timeout_seconds: Longest wait for one page to render
+            max_restarts: Number of times the renderer is restarted before rendering gives up
+            profile_path: Directory for the persistent WebEngine profile, or None for an in-memory one
+        """
+        self.timeout_seconds = timeout_seconds
+        self.max_restarts = max_restarts
+        self.profile_path = profile_path
+        self._lock = threading.Lock()
+        self._process: Process | None = None
+        self._request_queue: Queue | None = None
+        self._response_queue: Queue | None = None
+        self._next_request_id = 0
+        self.num_restarts = 0
+
+    def _start(self) -> None:
+        # Fresh queues, so nothing left over from a dead renderer is read as a response
+        self._request_queue = Queue()
+        self._response_queue = Queue()
+        self._process = Process(
+            target=_render_pages,
+            args=(self._request_queue, self._response_queue, self.profile_path),
+            daemon=True,
+        )
+        self._process.start()
+        logger.info(f"Started Qt renderer process {self._process.pid}")
+
+    def _kill(self) -> None:
+        if self._process is not None:
+            self._process.kill()
+            self._process.join()
+            self._process = None
+
+    def _restart(self, reason: str) -> None:
+        if self.num_restarts >= self.max_restarts:
+            self._kill()
+            raise RuntimeError(
+                f"Qt renderer {reason}, and it has already been restarted {self.num_restarts} times"
+            )
+        logger.info(f"Qt renderer {reason}, restarting it")
+        self.num_restarts += 1
+        self._kill()
+        self._start()
+
+    def render(self, url: str) -> str:
+        """
+        Render a page and return its HTML.
+
+        Raises:
+            TimeoutError: The page didn't render in time
+            RuntimeError: The page failed to load, or the renderer can't be kept running
+        """
+        with self._lock:
+            if self._process is None or not self._process.is_alive():
+                if self._process is None:
+                    self._start()
+                else:
+                    self._restart("exited")
+
+            request_id = self._next_request_id
+            self._next_request_id += 1
+            self._request_queue.put((request_id, url))
+
+            deadline = monotonic() + self.timeout_seconds
+            while True:
+                try:
+                    # Wake up every second to notice a crashed renderer
+                    response_id, html, error = self._response_queue.get(timeout=1)
+                except queue.Empty:
+                    if not self._process.is_alive():
+                        self._restart(f"crashed on {url}")
+                        raise RuntimeError(f"Qt renderer crashed rendering {url}")
+                    if monotonic() > deadline:
+                        # A hung renderer can't take more work
+                        self._restart(f"timed out on {url}")
+                        raise TimeoutError(
+                            f"Render of {url} took over {self.timeout_seconds} seconds"
+                        )
+                    continue
+                if response_id == request_id:
+                    break
+
+        if error:
+            raise RuntimeError(error)
+        return html
+
+    def page_from_url(
+        self, url: str, raise_errors: bool = False, ready_selector: str | None = None
+    ) -> FetchedPage | None:
+        """
+        Renders a web page, as the page loader for FETCH_MODE_QT.
+
+        :param url: URL to load.
+        :param raise_errors: Raise errors to the caller (e.g., for retrying) instead of returning None.
+        :param ready_selector: Not used; the page is read once it has finished loading.
+        :return: The rendered page.
+        """
+        try:
+            html = self.render(url)
+        except Exception as e:
+            if raise_errors:
+                raise
+            logger.info(f"Unable to render {url}: {e}")
+            return None
+        return FetchedPage(url, html.encode("utf-8"), HTML_UTF8, 200, final_url=url)
+
+    def close(self) -> None:
+        """Stops the renderer process."""
+        with self._lock:
+            if self._process is not None and self._process.is_alive():
+                self._request_queue.put(None)
+                self._process.join(timeout=10)
+            self._kill()
 
-    def on_load_finished(self):
-        self.toHtml(self.marshal_results)
-        logger.info("Load finished")
 
-    def marshal_results(self, html_str):
-        self.html = html_str
-        g_app.quit()
+def get_render_worker() -> Qt5RenderWorker:
+    """Return the renderer shared by this process, starting it on first use"""
+    global g_render_worker
+    if g_render_worker is None:
+        g_render_worker = Qt5RenderWorker()
+    return g_render_worker
 
 
 class Qt5RenderedSoup:
@@ -45,7 +210,7 @@ class Qt5RenderedSoup:
         self.url = url
 
     def get_soup(self):
-        page = Qt5WebPage(self.url)
-        soup = bs.BeautifulSoup(page.html, "html.parser")
+        html = get_render_worker().render(self.url)
+        soup = make_soup(html)
         logger.info(soup)
         return soup
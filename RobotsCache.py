@@ -0,0 +1,157 @@
+import json
+import logging
+import os
+import threading
+from time import time
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+import importer_globals as G
+from retry_policy import (
+    RETRYABLE_STATUS_CODES,
+    CircuitBreaker,
+    RetryPolicy,
+    call_with_retry,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class RobotsCache:
+    """
+    Process-wide cache of robots.txt files keyed by host.
+    Files are persisted to disk and re-read from the site only after their TTL expires,
+    so repeated runs don't fetch robots.txt again.
+    """
+
+    def __init__(
+        self,
+        cache_file: str,
+        ttl_seconds: float,
+        session: requests.Session | None = None,
+        retry_policy: RetryPolicy | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+    ):
+        """
+        Args:
+            cache_file: JSON file the fetched robots.txt files are persisted to
+            ttl_seconds: Age after which a host's robots.txt is fetched again
+            session: HTTP session to fetch robots.txt with
+            retry_policy: Backoff for transient fetch errors
+            circuit_breaker: Per-host breaker shared with the page fetches
+        """
+        self.cache_file = cache_file
+        self.ttl_seconds = ttl_seconds
+        self.session = session or requests.Session()
+        self.retry_policy = retry_policy
+        self.circuit_breaker = circuit_breaker
+        self._lock = threading.Lock()
+        self._parsers: dict[str, RobotFileParser] = {}
+
+        # host -> {"robots_url", "fetched_at", "status", "text"}
+        self._entries: dict[str, dict] = {}
+        try:
+            with open(cache_file, encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.info(f"Ignoring unreadable robots cache {cache_file}: {e}")
+
+    def _save(self) -> None:
+        # Failed fetches are only remembered for this run
+        entries = {
+            host: entry
+            for host, entry in self._entries.items()
+            if entry["status"] is not None and entry["status"] < 500
+        }
+        temp_file = f"{self.cache_file}.tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(entries, f, indent=1)
+        os.replace(temp_file, self.cache_file)
+
+    def _fetch(self, robots_url: str) -> dict:
+        """Read a robots.txt file from its site"""
+        logger.info(f"Fetching {robots_url}")
+
+        def get_robots():
+            response = self.session.get(
+                robots_url,
+                headers={"User-Agent": G.USER_AGENT},
+                timeout=G.HTTP_TIMEOUT_SECONDS,
+            )
+            # Transient errors are retried; other statuses are answers about robots.txt
+            if response.status_code in RETRYABLE_STATUS_CODES:
+                response.raise_for_status()
+            return response
+
+        try:
+            response = call_with_retry(
+                get_robots, robots_url, self.retry_policy, self.circuit_breaker
+            )
+            status = response.status_code
+            text = response.text if response.ok else ""
+        except Exception as e:
+            # Default to allowing crawling if robots.txt is inaccessible
+            logger.info(f"Error fetching robots.txt: {e}")
+            status = None
+            text = ""
+        return {
+            "robots_url": robots_url,
+            "fetched_at": time(),
+            "status": status,
+            "text": text,
+        }
+
+    @staticmethod
+    def _make_parser(entry: dict) -> RobotFileParser:
+        """Build a parser with the same semantics as RobotFileParser.read()"""
+        robot_parser = RobotFileParser(entry["robots_url"])
+        status = entry["status"]
+        if status in (401, 403):
+            robot_parser.disallow_all = True
+        elif status is None or 400 <= status < 600:
+            robot_parser.allow_all = True
+        else:
+            robot_parser.parse(entry["text"].splitlines())
+        return robot_parser
+
+    def parser_for_url(self, url: str) -> RobotFileParser:
+        """Return the robots.txt parser for a URL's host, fetching the file if it is missing or stale"""
+        parsed_url = urlparse(url)
+        host = parsed_url.netloc
+        with self._lock:
+            entry = self._entries.get(host)
+            if entry is None or time() - entry["fetched_at"] > self.ttl_seconds:
+                entry = self._entries[host] = self._fetch(
+                    f"{parsed_url.scheme}://{host}/robots.txt"
+                )
+                self._parsers.pop(host, None)
+                self._save()
+
+            robot_parser = self._parsers.get(host)
+            if robot_parser is None:
+                robot_parser = self._parsers[host] = self._make_parser(entry)
+
+        return robot_parser
+
+    def can_fetch(self, user_agent: str, url: str) -> bool:
+        """Return whether robots.txt allows the user agent to read the URL"""
+        return self.parser_for_url(url).can_fetch(user_agent, url)
+
+    def crawl_delay(self, user_agent: str, url: str) -> float | None:
+        """Return the seconds robots.txt asks crawlers to wait between requests to the URL's host"""
+        robot_parser = self.parser_for_url(url)
+        delay = robot_parser.crawl_delay(user_agent)
+        if delay is not None:
+            return float(delay)
+        rate = robot_parser.request_rate(user_agent)
+        if rate is not None and rate.requests:
+            return rate.seconds / rate.requests
+        return None
+
+    def site_maps(self, url: str) -> list[str]:
+        """Return the sitemap URLs listed in the URL host's robots.txt"""
+        return self.parser_for_url(url).site_maps() or []
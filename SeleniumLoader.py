@@ -1,58 +1,143 @@
 import logging
+import time
 
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from BrowserSessionFactory import BrowserSessionFactory
+from FetchedPage import HTML_UTF8, FetchedPage
 
 logger = logging.getLogger(__name__)
-# Import undetected_chromedriver only if you're planning to use it
-try:
-    import undetected_chromedriver as uc
 
-    UNDETECTED_AVAILABLE = True
-except ImportError:
-    UNDETECTED_AVAILABLE = False
+# URL patterns for each resource type the parsers never read. Blocking a type only stops
+# the download: <img> tags and their src/srcset attributes stay in the page.
+BLOCKED_RESOURCE_PATTERNS = {
+    "image": [
+        "*.png",
+        "*.jpg",
+        "*.jpeg",
+        "*.gif",
+        "*.webp",
+        "*.avif",
+        "*.svg",
+        "*.ico",
+    ],
+    "font": ["*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot"],
+    "media": ["*.mp4", "*.webm", "*.mp3", "*.m3u8"],
+    "tracking": [
+        "*google-analytics.com*",
+        "*googletagmanager.com*",
+        "*doubleclick.net*",
+        "*connect.facebook.net*",
+        "*hotjar.com*",
+        "*adservice.google.com*",
+    ],
+}
 
 
 class SeleniumLoader:
-    def __init__(self, undetected: bool = False):
+    def __init__(
+        self,
+        undetected: bool = False,
+        page_load_strategy: str = "normal",
+        blocked_resource_types: tuple[str, ...] = (),
+        blocked_url_patterns: tuple[str, ...] = (),
+        ready_timeout_seconds: float = 15.0,
+        session_factory: BrowserSessionFactory | None = None,
+        profile_name: str | None = None,
+        headless: bool | None = None,
+    ):
+        """
+        :param undetected: Use undetected_chromedriver.
+        :param page_load_strategy: "normal" waits for every resource to load, "eager" only for the DOM.
+        :param blocked_resource_types: Keys of BLOCKED_RESOURCE_PATTERNS whose downloads are blocked.
+        :param blocked_url_patterns: Additional URL patterns to block, with * wildcards.
+        :param ready_timeout_seconds: Longest wait for a page's ready selector.
+        :param session_factory: Factory that starts the browser, or None for a headless one with a throwaway profile.
+        :param profile_name: Persistent profile to run the browser with.
+        :param headless: Whether to hide the browser window, or None for the factory's default.
+        """
         self.undetected = undetected
-        if self.undetected and UNDETECTED_AVAILABLE:
-            self.driver = uc.Chrome()  # uc manages driver itself
-        else:
-            # Setup Chrome options
-            opts = Options()
-            # opts.add_argument("--headless")  # Uncomment if headless is needed
-            opts.add_argument(
-                "--log-level=3"
-            )  # Set log level to warning or higher severity
-
-            # Initialize the Chrome Driver using webdriver-manager
-            installer = ChromeDriverManager().install()
-            service = Service(installer)
-            self.driver = webdriver.Chrome(service=service, options=opts)
+        self.ready_timeout_seconds = ready_timeout_seconds
+        if session_factory is None:
+            session_factory = BrowserSessionFactory()
+        self.driver = session_factory.create_driver(
+            profile_name, headless, page_load_strategy, undetected
+        )
+
+        blocked_urls = list(blocked_url_patterns)
+        for resource_type in blocked_resource_types:
+            blocked_urls.extend(BLOCKED_RESOURCE_PATTERNS[resource_type])
+        if blocked_urls:
+            # Requests matching these patterns fail in the browser without going out
+            self.driver.execute_cdp_cmd("Network.enable", {})
+            self.driver.execute_cdp_cmd(
+                "Network.setBlockedURLs", {"urls": blocked_urls}
+            )
+
+        # Stats
+        self.num_pages = 0
+        self.render_seconds = 0.0
 
     def close(self):
         """Closes the Selenium WebDriver session."""
         self.driver.quit()
 
-    def soup_from_url(self, url: str):
+    def page_from_url(
+        self, url: str, raise_errors: bool = False, ready_selector: str | None = None
+    ) -> FetchedPage | None:
         """
-        Loads a web page in the current browser session and returns its BeautifulSoup representation.
+        Loads a web page in the current browser session.
 
         :param url: URL to load.
-        :return: BeautifulSoup object of the page source.
+        :param raise_errors: Raise errors to the caller (e.g., for retrying) instead of returning None.
+        :param ready_selector: CSS selector of an element whose presence shows the page's data has rendered.
+        :return: The rendered page source.
         """
+        start = time.monotonic()
         try:
             self.driver.get(url)
+            if ready_selector:
+                try:
+                    WebDriverWait(self.driver, self.ready_timeout_seconds).until(
+                        EC.presence_of_element_located(
+                            (By.CSS_SELECTOR, ready_selector)
+                        )
+                    )
+                except TimeoutException:
+                    # Some pages legitimately lack the element; parse what has rendered
+                    logger.info(f"{ready_selector} did not appear on {url}")
             # Screenshot for debugging (optional)
             if self.undetected:
                 self.driver.save_screenshot(r"c:/temp/selenium_screenshot.png")
-            soup = BeautifulSoup(self.driver.page_source, "html.parser")
+            page = FetchedPage(
+                url,
+                self.driver.page_source.encode("utf-8"),
+                HTML_UTF8,
+                final_url=self.driver.current_url,
+            )
         except Exception as e:
+            if raise_errors:
+                raise
             logger.info(f"Error loading {url}: {e}")
-            soup = None
+            page = None
 
-        return soup
+        self.num_pages += 1
+        self.render_seconds += time.monotonic() - start
+        return page
+
+    def soup_from_url(
+        self, url: str, raise_errors: bool = False, ready_selector: str | None = None
+    ):
+        """
+        Loads a web page in the current browser session and returns its BeautifulSoup representation.
+
+        :param url: URL to load.
+        :param raise_errors: Raise errors to the caller (e.g., for retrying) instead of returning None.
+        :param ready_selector: CSS selector of an element whose presence shows the page's data has rendered.
+        :return: BeautifulSoup object of the page source.
+        """
+        page = self.page_from_url(url, raise_errors, ready_selector)
+        return page.soup() if page else None
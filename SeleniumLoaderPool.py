@@ -0,0 +1,171 @@
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from FetchedPage import FetchedPage
+from SeleniumLoader import SeleniumLoader
+
+logger = logging.getLogger(__name__)
+
+
+class SeleniumLoaderPool:
+    """A fixed-size pool of SeleniumLoader drivers, so several pages can be rendered at once"""
+
+    def __init__(
+        self,
+        size: int = 1,
+        undetected: bool = False,
+        profile_prefix: str = "pool",
+        **loader_options,
+    ):
+        """
+        Drivers are started lazily, the first time every idle driver is busy.
+
+        Args:
+            size: Maximum number of browser drivers
+            undetected: Whether to use undetected_chromedriver
+            profile_prefix: Start of the drivers' profile names, which pools running at the
+                same time must not share
+            loader_options: Passed on to each SeleniumLoader (page load strategy, blocked resources)
+        """
+        if size < 1:
+            raise ValueError(f"Invalid pool size: {size}")
+
+        self.size = size
+        self.undetected = undetected
+        self.profile_prefix = profile_prefix
+        self.loader_options = loader_options
+        self._idle: queue.Queue[SeleniumLoader] = queue.Queue()
+        self._loaders: list[SeleniumLoader] = []
+        self._lock = threading.Lock()
+
+        # Stats
+        self._page_counts: dict[int, int] = {}
+        self._num_checkouts = 0
+        self._total_wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+
+    def _acquire(self, timeout: float | None) -> SeleniumLoader:
+        """Take an idle driver, starting a new one if the pool isn't full yet"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            start_new = len(self._loaders) < self.size
+            if start_new:
+                # Reserve the slot so other threads don't start a driver for it too
+                self._loaders.append(None)
+                slot = len(self._loaders) - 1
+
+        if start_new:
+            logger.info(f"Starting browser driver {slot + 1}/{self.size}")
+            try:
+                # Each slot keeps its own profile, since Chrome locks a profile while it runs
+                loader = SeleniumLoader(
+                    self.undetected,
+                    profile_name=f"{self.profile_prefix}-{slot + 1}",
+                    **self.loader_options,
+                )
+            except Exception:
+                with self._lock:
+                    self._loaders.pop(slot)
+                raise
+            with self._lock:
+                self._loaders[slot] = loader
+                self._page_counts[id(loader)] = 0
+            return loader
+
+        return self._idle.get(timeout=timeout)
+
+    @contextmanager
+    def checkout(self, timeout: float | None = None):
+        """
+        Check out a driver for the duration of a with block.
+
+        Args:
+            timeout: Seconds to wait for a driver to become free, or None to wait forever
+
+        Raises:
+            queue.Empty: No driver became free in time
+        """
+        start = time.monotonic()
+        loader = self._acquire(timeout)
+        wait_seconds = time.monotonic() - start
+        with self._lock:
+            self._num_checkouts += 1
+            self._total_wait_seconds += wait_seconds
+            self._max_wait_seconds = max(self._max_wait_seconds, wait_seconds)
+
+        try:
+            yield loader
+        finally:
+            self._idle.put(loader)
+
+    def page_from_url(
+        self, url: str, raise_errors: bool = False, ready_selector: str | None = None
+    ) -> FetchedPage | None:
+        """
+        Loads a web page on the next free driver.
+
+        :param url: URL to load.
+        :param raise_errors: Raise errors to the caller (e.g., for retrying) instead of returning None.
+        :param ready_selector: CSS selector of an element whose presence shows the page's data has rendered.
+        :return: The rendered page source.
+        """
+        with self.checkout() as loader:
+            with self._lock:
+                self._page_counts[id(loader)] += 1
+            page = loader.page_from_url(url, raise_errors, ready_selector)
+
+        return page
+
+    def soup_from_url(
+        self, url: str, raise_errors: bool = False, ready_selector: str | None = None
+    ):
+        """
+        Loads a web page on the next free driver and returns its BeautifulSoup representation.
+
+        :param url: URL to load.
+        :param raise_errors: Raise errors to the caller (e.g., for retrying) instead of returning None.
+        :param ready_selector: CSS selector of an element whose presence shows the page's data has rendered.
+        :return: BeautifulSoup object of the page source.
+        """
+        page = self.page_from_url(url, raise_errors, ready_selector)
+        return page.soup() if page else None
+
+    def stats(self) -> dict:
+        """Return the pool size, checkout wait times and the number of pages rendered by each driver"""
+        with self._lock:
+            loaders = [l for l in self._loaders if l is not None]
+            num_pages = sum(l.num_pages for l in loaders)
+            return {
+                "pool_size": self.size,
+                "drivers_started": len(loaders),
+                "checkouts": self._num_checkouts,
+                "total_wait_seconds": self._total_wait_seconds,
+                "max_wait_seconds": self._max_wait_seconds,
+                "mean_wait_seconds": (
+                    self._total_wait_seconds / self._num_checkouts
+                    if self._num_checkouts
+                    else 0.0
+                ),
+                "pages_per_driver": [self._page_counts[id(l)] for l in loaders],
+                "mean_render_seconds": (
+                    sum(l.render_seconds for l in loaders) / num_pages
+                    if num_pages
+                    else 0.0
+                ),
+            }
+
+    def close(self):
+        """Closes every driver in the pool."""
+        with self._lock:
+            loaders = [l for l in self._loaders if l is not None]
+            self._loaders.clear()
+            self._page_counts.clear()
+        for loader in loaders:
+            loader.close()
@@ -0,0 +1,188 @@
+import gzip
+import io
+import json
+import logging
+import os
+import re
+import xml.etree.ElementTree as ET
+from urllib.parse import urljoin
+
+import importer_globals as G
+from basic_utils import clean_up_url
+from EventParser import FETCH_MODE_HTTP, EventParser
+from parser_common_code import (
+    circuit_breaker,
+    get_page_loader,
+    get_retry_policy,
+    get_robots_cache,
+    politeness_scheduler,
+)
+from retry_policy import call_with_retry
+
+logger = logging.getLogger(__name__)
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def _local_name(tag: str) -> str:
+    """Tag name without its XML namespace"""
+    return tag.rsplit("}", 1)[-1]
+
+
+class SitemapDiscovery:
+    """
+    Discovers event URLs from a parser's sitemaps, returning only the URLs that are new or whose
+    <lastmod> changed since the last run.
+    Sitemap indexes are followed to their child sitemaps, gzipped sitemaps are decompressed, and
+    sitemaps are read through the page cache, so an unchanged sitemap costs a 304. The lastmod
+    seen for each URL is kept in a JSON file; call save() with the URLs that were processed.
+    """
+
+    def __init__(self, parser: EventParser, state_file: str):
+        """
+        Args:
+            parser: Parser declaring the sitemaps and the pattern its event URLs match
+            state_file: JSON file of the lastmod seen for each URL in earlier runs
+        """
+        self.parser = parser
+        self.state_file = state_file
+        self.url_pattern = re.compile(parser.SITEMAP_URL_PATTERN or "")
+        self._lastmods: dict[str, str | None] = {}
+        self._seen_lastmods: dict[str, str | None] = {}
+        try:
+            with open(state_file, encoding="utf-8") as f:
+                self._lastmods = json.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.info(f"Ignoring unreadable sitemap state {state_file}: {e}")
+
+        # Counters
+        self.num_sitemaps = 0
+        self.num_urls = 0
+
+    def _sitemap_urls(self) -> list[str]:
+        """The parser's sitemaps, or those listed in its site's robots.txt"""
+        if self.parser.SITEMAP_URLS:
+            return list(self.parser.SITEMAP_URLS)
+        site_url = self.parser.SITEMAP_SITE_URL
+        if not site_url:
+            raise ValueError(f"{type(self.parser).__name__} declares no sitemap")
+        return get_robots_cache().site_maps(site_url) or [
+            urljoin(site_url, "/sitemap.xml")
+        ]
+
+    def _read_sitemap(self, sitemap_url: str) -> bytes:
+        """Read a sitemap, decompressing it if it is gzipped"""
+        if not get_robots_cache().can_fetch(G.USER_AGENT, sitemap_url):
+            logger.info(f"Disallowed sitemap {sitemap_url}")
+            return b""
+        politeness_scheduler.wait_for_turn(sitemap_url)
+        loader = get_page_loader(FETCH_MODE_HTTP)
+        body, _ = call_with_retry(
+            lambda: loader.fetch(sitemap_url),
+            sitemap_url,
+            get_retry_policy(),
+            circuit_breaker,
+        )
+        # .xml.gz files are served as gzip data rather than with a gzip Content-Encoding
+        if body[:2] == GZIP_MAGIC:
+            body = gzip.decompress(body)
+        return body
+
+    def _parse_sitemap(self, sitemap_url: str, to_read: list[str]) -> None:
+        """Record the URLs in a sitemap, queuing the child sitemaps of a sitemap index"""
+        self.num_sitemaps += 1
+        logger.info(f"Reading sitemap {sitemap_url}")
+        try:
+            body = self._read_sitemap(sitemap_url)
+        except Exception as e:
+            logger.info(f"Unable to read sitemap {sitemap_url}: {e}")
+            return
+
+        loc = lastmod = None
+        try:
+            # Entries are cleared as they are read, so a large sitemap is never held as a whole tree
+            for _, element in ET.iterparse(io.BytesIO(body)):
+                tag = _local_name(element.tag)
+                if tag == "loc" and loc is None:
+                    # The entry's own <loc> comes first; extensions (e.g., image:loc) follow it
+                    loc = (element.text or "").strip()
+                elif tag == "lastmod":
+                    lastmod = (element.text or "").strip() or None
+                elif tag in ("url", "sitemap"):
+                    if loc:
+                        if tag == "sitemap":
+                            to_read.append(loc)
+                        elif self.url_pattern.search(loc):
+                            self.num_urls += 1
+                            self._seen_lastmods[clean_up_url(loc)] = lastmod
+                    loc = lastmod = None
+                    element.clear()
+        except ET.ParseError as e:
+            logger.info(f"Unable to parse sitemap {sitemap_url}: {e}")
+
+    def discover(self) -> list[str]:
+        """Return the matching URLs that are new or changed since the last run"""
+        to_read = self._sitemap_urls()
+        read = set()
+        while to_read:
+            sitemap_url = to_read.pop(0)
+            if sitemap_url not in read:
+                read.add(sitemap_url)
+                self._parse_sitemap(sitemap_url, to_read)
+
+        # A URL without a lastmod can't be seen to change, so it is only returned the first time
+        urls = [
+            url
+            for url, lastmod in self._seen_lastmods.items()
+            if url not in self._lastmods or self._lastmods[url] != lastmod
+        ]
+        logger.info(
+            f"Read {self.num_sitemaps} sitemaps with {self.num_urls} matching URLs, "
+            f"{len(urls)} of them new or changed"
+        )
+        return sorted(urls)
+
+    def save(self, urls) -> None:
+        """
+        Remember the lastmods seen in this run for the URLs that were processed, so the next run
+        skips them unless they change. The other discovered URLs are returned again next run.
+
+        Args:
+            urls: URLs that were fetched or filtered out, e.g., from the fetch journal
+        """
+        self._lastmods.update(
+            (url, self._seen_lastmods[url])
+            for url in urls
+            if url in self._seen_lastmods
+        )
+        temp_file = f"{self.state_file}.tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(self._lastmods, f, indent=1, sort_keys=True)
+        os.replace(temp_file, self.state_file)
+
+
+def discover_sitemap_urls_to_file(
+    parser: EventParser, url_file_path: str, state_file: str
+) -> tuple[list[str], SitemapDiscovery]:
+    """
+    Discover a parser's new and changed event URLs from its sitemaps and write them to its URL file.
+
+    Args:
+        parser: Parser declaring the sitemaps
+        url_file_path: URL file to write
+        state_file: JSON file of the lastmods seen in earlier runs
+
+    Returns:
+        The URLs, and the discovery whose save() records them as seen
+    """
+    discovery = SitemapDiscovery(parser, state_file)
+    urls = discovery.discover()
+
+    # Write the URLs out to a file for safekeeping
+    with open(url_file_path, "w", newline="\n") as url_file:
+        for url in urls:
+            url_file.write(url + "\n")
+
+    return urls, discovery
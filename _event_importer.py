@@ -1,40 +1,26 @@
 # Set up basic logging
+import argparse
 import logging
-from dataclasses import dataclass
-from typing import Any, Callable, Optional
+from typing import Callable, Collection
 
 import importer_globals as G
-from BargemusicParser import BargemusicParser
 from basic_utils import clean_up_urls
-from BirdlandParser import BirdlandParser
-from BlueNoteParser import BlueNoteParser
-from CarnegieHallParser import CarnegieHallParser
-from CmsParser import CmsParser
-from EventBriteParser_v2 import EventBriteParser_v2
+from event_pipeline import fetch_and_parse_events
 from EventParser import EventParser
-from JazzOrgParser import JazzOrgParser
-from JuilliardParser import JuilliardParser
-from KaufmanParser import KaufmanParser
-from LincolnCenterParser import LincolnCenterParser
-from MannesParser import MannesParser
-from MsmParser import MsmParser
-from NationalSawdustParser import NationalSawdustParser
-from NinetySecondsStreetYParser import NinetySecondStreetYParser
-from NjPacParser import NjPacParser
-from NyplParser import NyplParser
+from FetchJournal import FAILED, PENDING, FetchJournal
+from ListingCrawler import crawl_listing_to_url_file
+from PageArchive import PageArchive
+from parallel_parse import parse_pages_in_processes
 from parser_common_code import (
-    check_contents_file,
     data_path,
     parse_pages_to_events,
     serve_urls_from_file,
     write_event_rows_to_import_file,
-    write_pages_to_soup_file,
+    write_pages_to_archive,
 )
 from prior_urls import append_to_prior_urls_file
-from ScandinaviaHouseParser import ScandinaviaHouseParser
-from SpectrumParser import SpectrumParser
-from SymphonySpaceParser import SymphonySpaceParser
-from ZincParser import ZincParser
+from SitemapDiscovery import discover_sitemap_urls_to_file
+from venues import page_archive_file_name, venue_configurations
 
 # Set up logging with a custom formatter including the current time to the second, severity, filename, function, and line number
 logging.basicConfig(
@@ -47,17 +33,30 @@ logger.info("Starting event importer")
 
 
 def process_events(
+    venue: str,
     live_read_from_urls: bool,
     parser: EventParser,
     url_getter: Callable | None = None,
-    last_urls: list[str] | None = None,
+    fetch_journal: FetchJournal | None = None,
+    stream: bool = False,
+    num_parse_processes: int = 1,
+    overwrite_archive: bool = False,
+    refetch_urls: Collection[str] = (),
+    refetch_archived: bool = False,
 ):
     """Generic processor for different parsers
     Args:
+        venue: The venue whose events are processed
         live_read_from_urls: Whether to read the URLs' contents from their website
         parser: The parser to use
         url_getter: A callable that returns a list of URLs
-        last_urls: A list of URLs to skip
+        fetch_journal: Journal of the fetch runs; an unfinished run is resumed instead of starting over
+        stream: When reading from the website, also parse the pages as they arrive and return the event rows
+        num_parse_processes: When parsing the page archive, the number of processes to parse in
+        overwrite_archive: When reading from the website, delete the archived pages first and fetch every URL again
+        refetch_urls: URLs fetched again even if they are archived, e.g., those a sitemap shows have changed
+        refetch_archived: When reading from the website, fetch every URL again, archived or not. New copies
+            replace the archived ones, and the pages that changed keep their old copies in their history.
     """
     if live_read_from_urls:
         # Read all the individual page URLs
@@ -66,27 +65,75 @@ def process_events(
             urls = url_getter()
             # TODO: Write URLs to file
         else:
-            urls = serve_urls_from_file(url_file_path)
-        if last_urls:
-            new_urls = list(set(urls) - set(last_urls))
-            urls = new_urls
+            urls = [url for _, url in serve_urls_from_file(url_file_path)]
+
+        if overwrite_archive:
+            logger.info(f"Deleting the pages in {page_archive.archive_path}")
+            page_archive.clear()
+        elif not refetch_archived:
+            # Archived pages are parsed from the archive, not fetched again, unless they are
+            # known to have changed
+            refetch_urls = set(refetch_urls)
+            num_urls = len(urls)
+            urls = [
+                url for url in urls if url in refetch_urls or url not in page_archive
+            ]
             logger.info(
-                f"Skipping {len(new_urls) - len(urls)} URLs that were found in the last contents file"
+                f"Skipping {num_urls - len(urls)} URLs that were found in the page archive"
+            )
+
+        # Skip the URLs an interrupted run already fetched or gave up on
+        if fetch_journal is not None:
+            fetch_journal.start_run(urls)
+            urls = fetch_journal.urls_to_fetch()
+        new_urls = [(len(urls), url) for url in urls]
+        # The venue's request rate goes to the politeness scheduler for each of its hosts
+        info = venue_configurations[venue]
+        if stream:
+            event_rows = fetch_and_parse_events(
+                new_urls,
+                page_archive,
+                parser,
+                G.PIPELINE_PARSE_WORKERS,
+                G.PIPELINE_QUEUE_SIZE,
+                fetch_journal,
+                info.seconds_to_wait,
+                info.burst,
             )
         else:
-            new_urls = urls
-        write_pages_to_soup_file(new_urls, csv_page_contents_file_path, parser)
+            write_pages_to_archive(
+                new_urls,
+                page_archive,
+                parser,
+                fetch_journal,
+                info.seconds_to_wait,
+                info.burst,
+            )
+            event_rows = None
+        if fetch_journal is not None:
+            fetch_journal.finish_run()
 
-        return None
+        return event_rows
     else:
         # Read the HTML pages and parse them to events
-        event_rows = parse_pages_to_events(csv_page_contents_file_path, parser)
+        if num_parse_processes > 1:
+            return parse_pages_in_processes(venue, page_archive, num_parse_processes)
+        event_rows = parse_pages_to_events(page_archive, parser)
         return event_rows
 
 
 if __name__ == "__main__":
     """Main program"""
 
+    arg_parser = argparse.ArgumentParser(description="Import a venue's events")
+    arg_parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes to parse the page archive in (default 1)",
+    )
+    args = arg_parser.parse_args()
+
     venue = "SYMPHONY_SPACE"  # Last used Oct 9 2019
     venue = "ZINC-JAZZ"  # Website unavailable Dec 31 2024
     venue = "NATIONAL_SAWDUST"  # Last used Aug 4 2022
@@ -109,36 +156,12 @@ if __name__ == "__main__":
     venue = "BIRDLAND"  # Last used July 4 2025
 
     LIVE_READ_FROM_URLS = False
-
-    @dataclass
-    class VenueInfo:
-        parser: Any  # Assuming the parser can be any type, adjust as needed
-        num_url_tries: Optional[int] = None
-        seconds_to_wait: Optional[float] = None
-
-    # Dictionary for venue configurations
-    venue_configurations = {
-        "92Y": VenueInfo(NinetySecondStreetYParser()),
-        "BARGEMUSIC": VenueInfo(BargemusicParser()),
-        "BIRDLAND": VenueInfo(BirdlandParser()),
-        "BLUE_NOTE": VenueInfo(BlueNoteParser()),
-        "CARNEGIE": VenueInfo(CarnegieHallParser(), 1, 120.0),
-        "CMS": VenueInfo(CmsParser()),
-        "EVENTBRITE": VenueInfo(EventBriteParser_v2(), None, 1),
-        "JAZZ_ORG": VenueInfo(JazzOrgParser()),
-        "JUILLIARD": VenueInfo(JuilliardParser()),
-        "KAUFMAN": VenueInfo(KaufmanParser()),
-        "LINCOLN_CENTER": VenueInfo(LincolnCenterParser(), None, 20.0),
-        "MANNES": VenueInfo(MannesParser(), 2, 10.0),
-        "MSM": VenueInfo(MsmParser()),
-        "NATIONAL_SAWDUST": VenueInfo(NationalSawdustParser()),
-        "NJPAC": VenueInfo(NjPacParser()),
-        "NYPL": VenueInfo(NyplParser()),
-        "SCANDINAVIA_HOUSE": VenueInfo(ScandinaviaHouseParser()),
-        "SPECTRUM": VenueInfo(SpectrumParser()),
-        "SYMPHONY_SPACE": VenueInfo(SymphonySpaceParser()),
-        "ZINC-JAZZ": VenueInfo(ZincParser()),
-    }
+    # With LIVE_READ_FROM_URLS, delete the archived pages and fetch every URL again instead of only the new ones
+    OVERWRITE_PAGE_ARCHIVE = False
+    # With LIVE_READ_FROM_URLS, fetch every URL again, replacing the archived pages through their history
+    REFETCH_ARCHIVED_PAGES = False
+    # With LIVE_READ_FROM_URLS, parse the pages as they are fetched and write the import file in the same run
+    STREAM_PIPELINE = True
 
     # Usage example with the dictionary
     if venue in venue_configurations:
@@ -146,34 +169,75 @@ if __name__ == "__main__":
 
         # Calculate file names based on venue
         url_file_path = data_path(f"{venue.lower()}_urls.txt")
-        csv_page_contents_file_path = data_path(f"{venue.lower()}_event_contents.csv")
+        page_archive_path = data_path(page_archive_file_name(venue))
+        fetch_journal_path = data_path(f"{venue.lower()}_fetch_journal.sqlite")
         importer_file_path = data_path(f"import_events_{venue.lower()}.csv")
 
-        if LIVE_READ_FROM_URLS:
-            # Check if the contents file exists
-            last_urls = check_contents_file(csv_page_contents_file_path)
-        else:
-            last_urls = None
+        # Contents CSVs from earlier versions are imported with migrate_contents_csv.py
+        page_archive = PageArchive(
+            page_archive_path,
+            G.PAGE_ARCHIVE_DICTIONARY_MIN_PAGES,
+            G.PAGE_ARCHIVE_DICTIONARY_RETRAIN_PAGES,
+        )
+        fetch_journal = FetchJournal(fetch_journal_path, G.FETCH_JOURNAL_MAX_TRIES)
 
         # Set global variables if they exist
         if info.num_url_tries is not None:
             G.NUM_URL_TRIES = info.num_url_tries
         if info.seconds_to_wait is not None:
             G.SECONDS_TO_WAIT_BETWEEN_URL_READS = info.seconds_to_wait
+        if info.burst is not None:
+            G.POLITENESS_BURST = info.burst
+        if info.fetch_mode is not None:
+            info.parser.FETCH_MODE = info.fetch_mode
+
+        sitemap_discovery = None
+        changed_urls = []
 
         # For a parser that has a read_urls method, call it to create the URLs file
         # (URLs are returned for debugging)
         if hasattr(info.parser, "read_urls") and LIVE_READ_FROM_URLS:
             urls = clean_up_urls(info.parser.read_urls(url_file_path))
+        # Parsers that declare a paginated listing have it crawled instead
+        elif info.parser.LISTING_URL_TEMPLATE and LIVE_READ_FROM_URLS:
+            urls = crawl_listing_to_url_file(info.parser, url_file_path)
+        # Parsers that declare sitemaps get only their new and changed URLs
+        elif (
+            info.parser.SITEMAP_URLS or info.parser.SITEMAP_SITE_URL
+        ) and LIVE_READ_FROM_URLS:
+            urls, sitemap_discovery = discover_sitemap_urls_to_file(
+                info.parser, url_file_path, G.SITEMAP_STATE_FILE
+            )
+            # Every URL discovery returns is new or changed, so archived ones are fetched again.
+            # That way each of them reaches the fetch journal and has its lastmod saved.
+            changed_urls = urls
 
         # Now call process_events with the relevant info
         csv_rows = process_events(
+            venue,
             LIVE_READ_FROM_URLS,
             info.parser,
             None,
-            last_urls,
+            fetch_journal,
+            STREAM_PIPELINE,
+            args.workers,
+            OVERWRITE_PAGE_ARCHIVE,
+            changed_urls,
+            REFETCH_ARCHIVED_PAGES,
         )
 
+        if sitemap_discovery:
+            # The pages that were read, filtered out or skipped on purpose (e.g., events already
+            # live) can be skipped next run unless they change. URLs that failed or are still
+            # waiting to be fetched are discovered again.
+            unfinished_urls = set(fetch_journal.urls_in_states(PENDING, FAILED))
+            sitemap_discovery.save(
+                [url for url in changed_urls if url not in unfinished_urls]
+            )
+
+        page_archive.close()
+        fetch_journal.close()
+
         if csv_rows:
             # Append the URLs to the file with previously scraped URLs
             urls = [r["event_website"] for r in csv_rows]
@@ -183,7 +247,7 @@ if __name__ == "__main__":
         raise ValueError(f'Invalid venue: "{venue}"')
 
     # Write rows to the Events Calendar CSV file
-    if (not LIVE_READ_FROM_URLS) and csv_rows:
+    if ((not LIVE_READ_FROM_URLS) or STREAM_PIPELINE) and csv_rows:
         write_event_rows_to_import_file(importer_file_path, csv_rows, max_num_rows=0)
 
     logger.info(
@@ -1,3 +1,6 @@
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
 def clean_up_url(url: str) -> str:
     """Clean up a URL by removing whitespace and trailing slashes
 
@@ -20,3 +23,22 @@ def clean_up_urls(urls: list[str]) -> list[str]:
         list[str]: A list of cleaned up URLs
     """
     return [clean_up_url(url) for url in urls if url.strip()]
+
+
+def canonicalize_url(url: str) -> str:
+    """Canonical form of a URL for use as a cache key: lowercase scheme and host, no default
+    port, no fragment, sorted query parameters and no trailing slash
+
+    Args:
+        url: A URL
+
+    Returns:
+        The canonical URL
+    """
+    parts = urlsplit(clean_up_url(url))
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if (scheme, parts.port) in (("http", 80), ("https", 443)):
+        netloc = netloc.rsplit(":", 1)[0]
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, netloc, parts.path, query, "")).removesuffix("/")
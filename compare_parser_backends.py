@@ -0,0 +1,272 @@
+"""
+Check that the parsers give the same event rows with each BeautifulSoup backend.
+Every venue's parser is run over the pages in its page archive once per backend, and the rows
+are compared field by field. The parsers were written against html.parser, the run's default
+backend. A parser whose rows match with lxml on all its pages can opt in to it by setting
+HTML_PARSER_BACKEND.
+
+With --partial, each parser that declares PARSE_ONLY regions is instead run over its pages with
+the whole page parsed and with only its regions parsed. The rows are compared the same way, and
+the time and peak memory per page of each are logged, to measure what the regions save.
+With --indexed, each parser that sets INDEXED_SOUP is compared the same way with and without
+the IndexedSoup, to measure what the index saves.
+
+Usage:
+    python compare_parser_backends.py [--venue BIRDLAND ...] [--max-pages 200] [--partial | --indexed]
+"""
+
+import argparse
+import logging
+import tracemalloc
+from functools import partial
+from pathlib import Path
+from time import perf_counter
+
+from FetchedPage import HTML_PARSER_BACKEND, LXML_AVAILABLE, LXML_BACKEND, make_soup
+from IndexedSoup import IndexedSoup
+from PageArchive import PageArchive
+from parser_common_code import data_path, parser_soup
+from venues import page_archive_file_name, venue_configurations
+
+logger = logging.getLogger(__name__)
+
+# The first backend is the reference the others are compared with
+BACKENDS = (HTML_PARSER_BACKEND, LXML_BACKEND)
+
+# Features compared instead of the backends, and what to do about a parser whose rows differ
+PARTIAL = "partial"
+INDEXED = "indexed"
+FEATURE_FIXES = {PARTIAL: "Widen the PARSE_ONLY regions", INDEXED: "Unset INDEXED_SOUP"}
+
+
+class ParseFailure(str):
+    """The error a parser raised, in place of the row it would have made"""
+
+
+def parse_with_backend(parser, page, backend: str):
+    """
+    Return the row a parser makes of a page with a backend, from the soup parse_page_to_event
+    would give it, or the error it raised
+    """
+    try:
+        return parser.parse_soup_to_event(page.url, parser_soup(page, parser, backend))
+    except Exception as e:
+        return ParseFailure(f"{type(e).__name__}: {e}")
+
+
+def parse_built_soup(parser, url: str, build_soup, markup: str | bytes):
+    """Return the row a parser makes of a soup built from a page's markup, or the error it raised"""
+    try:
+        return parser.parse_soup_to_event(url, build_soup(markup))
+    except Exception as e:
+        return ParseFailure(f"{type(e).__name__}: {e}")
+
+
+def peak_memory(build_soup, markup: str | bytes) -> int:
+    """Return the peak memory, in bytes, of building a soup from a page's markup"""
+    tracemalloc.start()
+    try:
+        build_soup(markup)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def row_differences(reference, row) -> list[str]:
+    """
+    Return the fields whose values differ between two parse results. A parser that raised is a
+    difference even if it raised the same error both times, since nothing was compared.
+    """
+    failures = [r for r in (reference, row) if isinstance(r, ParseFailure)]
+    if failures:
+        return [f"raised {failure}" for failure in failures]
+    if not isinstance(reference, dict) or not isinstance(row, dict):
+        return [] if reference == row else [f"{reference!r} != {row!r}"]
+    return [
+        f"{key}: {reference.get(key)!r} != {row.get(key)!r}"
+        for key in sorted(set(reference) | set(row))
+        if reference.get(key) != row.get(key)
+    ]
+
+
+def compare_venue(venue: str, max_pages: int | None) -> bool | None:
+    """
+    Compare a venue's rows across backends.
+
+    Returns:
+        Whether every backend matched the reference, or None if the venue has no page archive or its
+        parser builds no soup
+    """
+    archive_path = data_path(page_archive_file_name(venue))
+    parser = venue_configurations[venue].parser
+    if parser.STRUCTURED_DATA_ONLY or not Path(archive_path).exists():
+        return None
+
+    page_archive = PageArchive(archive_path)
+    seconds = dict.fromkeys(BACKENDS, 0.0)
+    num_pages = 0
+    differing_pages: dict[str, list[str]] = {backend: [] for backend in BACKENDS[1:]}
+    try:
+        for page in page_archive.pages():
+            if max_pages is not None and num_pages >= max_pages:
+                break
+            num_pages += 1
+            rows = {}
+            for backend in BACKENDS:
+                start = perf_counter()
+                rows[backend] = parse_with_backend(parser, page, backend)
+                seconds[backend] += perf_counter() - start
+            for backend in BACKENDS[1:]:
+                differences = row_differences(rows[BACKENDS[0]], rows[backend])
+                if differences:
+                    differing_pages[backend].append(page.url)
+                    logger.info(f"{venue} {backend} differs on {page.url}:")
+                    for difference in differences:
+                        logger.info(f"    {difference}")
+    finally:
+        page_archive.close()
+
+    timings = ", ".join(f"{backend} {seconds[backend]:.1f} s" for backend in BACKENDS)
+    logger.info(f"{venue}: {num_pages} pages, {timings}")
+    for backend, urls in differing_pages.items():
+        if urls:
+            logger.info(
+                f"{venue}: {len(urls)} pages differ with {backend}. Keep "
+                f"{type(parser).__name__} on {BACKENDS[0]}."
+            )
+        elif num_pages:
+            logger.info(
+                f"{venue}: all pages match with {backend}. It can be used with "
+                f'{type(parser).__name__}.HTML_PARSER_BACKEND = "{backend}"'
+            )
+    return not any(differing_pages.values())
+
+
+def soup_variants(parser, feature: str) -> dict | None:
+    """
+    Return the ways of building a parser's soup from a page's markup that a --partial or --indexed
+    run compares, by name with the reference first, or None if the parser doesn't use the feature
+    """
+    backend = parser.HTML_PARSER_BACKEND
+    if feature == PARTIAL:
+        if parser.PARSE_ONLY is None:
+            return None
+        return {
+            "whole page": lambda markup: make_soup(markup, backend),
+            "regions": lambda markup: make_soup(markup, backend, parser.PARSE_ONLY),
+        }
+    if not parser.INDEXED_SOUP:
+        return None
+    return {
+        "soup": lambda markup: make_soup(markup, backend, parser.PARSE_ONLY),
+        "indexed soup": lambda markup: IndexedSoup(
+            make_soup(markup, backend, parser.PARSE_ONLY)
+        ),
+    }
+
+
+def compare_venue_variants(
+    venue: str, max_pages: int | None, feature: str
+) -> bool | None:
+    """
+    Compare a venue's rows with its soup built each way a feature allows, logging the time and
+    peak memory per page of each.
+
+    Returns:
+        Whether the rows matched, or None if the venue has no page archive or its parser doesn't
+        use the feature
+    """
+    archive_path = data_path(page_archive_file_name(venue))
+    parser = venue_configurations[venue].parser
+    variants = soup_variants(parser, feature)
+    if variants is None or not Path(archive_path).exists():
+        return None
+
+    reference, *others = variants
+    seconds = dict.fromkeys(variants, 0.0)
+    peak_bytes = dict.fromkeys(variants, 0)
+    num_pages = 0
+    differing_urls = []
+    page_archive = PageArchive(archive_path)
+    try:
+        for page in page_archive.pages():
+            if max_pages is not None and num_pages >= max_pages:
+                break
+            num_pages += 1
+            markup = page.markup()
+            rows = {}
+            for name, build_soup in variants.items():
+                start = perf_counter()
+                rows[name] = parse_built_soup(parser, page.url, build_soup, markup)
+                seconds[name] += perf_counter() - start
+                peak_bytes[name] += peak_memory(build_soup, markup)
+            for name in others:
+                differences = row_differences(rows[reference], rows[name])
+                if differences:
+                    differing_urls.append(page.url)
+                    logger.info(f"{venue} {name} differs on {page.url}:")
+                    for difference in differences:
+                        logger.info(f"    {difference}")
+    finally:
+        page_archive.close()
+
+    if num_pages:
+        costs = ", ".join(
+            f"{name} {1000 * seconds[name] / num_pages:.1f} ms "
+            f"and {peak_bytes[name] / num_pages / 1024:.0f} KiB per page"
+            for name in variants
+        )
+        logger.info(f"{venue}: {num_pages} pages, {costs}")
+    if differing_urls:
+        logger.info(
+            f"{venue}: {len(differing_urls)} pages differ. {FEATURE_FIXES[feature]} in "
+            f"{type(parser).__name__}."
+        )
+    return not differing_urls
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s|%(levelname)s|%(filename)s|%(funcName)s|%(lineno)d|%(message)s",
+    )
+    arg_parser = argparse.ArgumentParser(
+        description="Compare the parsers' event rows across HTML parser backends"
+    )
+    arg_parser.add_argument(
+        "--venue", action="append", help="Venue to check; may be repeated"
+    )
+    arg_parser.add_argument(
+        "--max-pages", type=int, help="Most pages to parse for each venue"
+    )
+    features = arg_parser.add_mutually_exclusive_group()
+    features.add_argument(
+        "--partial",
+        dest="feature",
+        action="store_const",
+        const=PARTIAL,
+        help="Compare parsing the parsers' PARSE_ONLY regions with parsing whole pages",
+    )
+    features.add_argument(
+        "--indexed",
+        dest="feature",
+        action="store_const",
+        const=INDEXED,
+        help="Compare the INDEXED_SOUP parsers with and without the index",
+    )
+    args = arg_parser.parse_args()
+    if args.feature:
+        compare = partial(compare_venue_variants, feature=args.feature)
+        skipped = f"no page archive or not {args.feature}"
+    elif LXML_AVAILABLE:
+        compare, skipped = compare_venue, "no page archive or no soup"
+    else:
+        raise SystemExit("Install lxml to compare it with html.parser")
+
+    results = {
+        venue: compare(venue, args.max_pages)
+        for venue in args.venue or sorted(venue_configurations)
+    }
+    for venue, matched in results.items():
+        status = {None: skipped, True: "matches", False: "DIFFERS"}[matched]
+        logger.info(f"{venue}: {status}")
@@ -0,0 +1,163 @@
+import logging
+import queue
+import threading
+from time import monotonic
+
+from FetchJournal import FetchJournal
+from PageArchive import PageArchive
+from parser_common_code import (
+    fetch_pages,
+    log_parse_cache_stats,
+    parse_page_to_event,
+)
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's output
+_DONE = object()
+
+
+class _PipelineStopped(Exception):
+    """Another stage failed, so this one stops too"""
+
+
+def _put(q: queue.Queue, item, stop: threading.Event) -> None:
+    """Put an item on a bounded queue, waiting for room unless the pipeline is stopping"""
+    while True:
+        if stop.is_set():
+            raise _PipelineStopped()
+        try:
+            q.put(item, timeout=0.5)
+            return
+        except queue.Full:
+            pass
+
+
+def _get(q: queue.Queue, stop: threading.Event):
+    """Get an item from a queue, waiting for one unless the pipeline is stopping"""
+    while True:
+        if stop.is_set():
+            raise _PipelineStopped()
+        try:
+            return q.get(timeout=0.5)
+        except queue.Empty:
+            pass
+
+
+def fetch_and_parse_events(
+    urls,
+    page_archive: PageArchive,
+    parser,
+    num_parse_workers: int = 2,
+    queue_size: int = 20,
+    fetch_journal: FetchJournal | None = None,
+    seconds_per_request: float | None = None,
+    burst: int | None = None,
+) -> list[dict]:
+    """
+    Fetch, parse and filter a venue's events in one pass.
+    Pages flow from the fetchers to a pool of parse workers through a bounded queue, so parsing
+    overlaps with fetching and a slow stage holds the one before it back. Fetched pages are still
+    written to the page archive, and pages already in the archive are parsed along with them.
+
+    Args:
+        urls: (number of URLs, URL) pairs to fetch
+        page_archive: Page archive, written to as pages are fetched
+        parser: Parser the pages are fetched and parsed with
+        num_parse_workers: Number of pages parsed at once
+        queue_size: Pages that can wait between fetching and parsing
+        fetch_journal: Journal to record each URL's outcome in
+        seconds_per_request: Venue's spacing between requests to a host; None for the default
+        burst: Venue's requests to a host allowed back to back; None for the default
+
+    Returns:
+        The filtered event rows
+    """
+    page_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    row_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    errors: list[BaseException] = []
+    counts = {"archived": 0, "fetched": 0}
+    start = monotonic()
+
+    def run_stage(stage):
+        def run():
+            try:
+                stage()
+            except _PipelineStopped:
+                pass
+            except BaseException as e:
+                logger.exception(
+                    f"Pipeline stage {threading.current_thread().name} failed"
+                )
+                errors.append(e)
+                stop.set()
+
+        return run
+
+    def produce_pages():
+        # Pages from earlier runs first. Their URLs are read before any page is written,
+        # so fetched pages aren't parsed twice. An archived page whose URL is about to be
+        # fetched again is left for its new copy.
+        urls_to_fetch = {url for _, url in urls}
+        for page in page_archive.pages():
+            if page.url in urls_to_fetch:
+                continue
+            _put(page_queue, page, stop)
+            counts["archived"] += 1
+
+        pages = fetch_pages(urls, parser, fetch_journal, seconds_per_request, burst)
+        try:
+            for page in pages:
+                page_archive.put(page)
+                _put(page_queue, page, stop)
+                counts["fetched"] += 1
+        finally:
+            pages.close()
+            for _ in range(num_parse_workers):
+                _put(page_queue, _DONE, stop)
+
+    def parse_pages():
+        try:
+            while (page := _get(page_queue, stop)) is not _DONE:
+                event_row = parse_page_to_event(page, parser)
+                if event_row:
+                    _put(row_queue, event_row, stop)
+        finally:
+            _put(row_queue, _DONE, stop)
+
+    threads = [threading.Thread(target=run_stage(produce_pages), name="fetch")]
+    threads += [
+        threading.Thread(target=run_stage(parse_pages), name=f"parse-{i + 1}")
+        for i in range(num_parse_workers)
+    ]
+    for thread in threads:
+        thread.start()
+
+    # Collect the rows here. The import file is sorted by date, so it is written once all rows are in.
+    event_rows = []
+    num_parsers_done = 0
+    try:
+        while num_parsers_done < num_parse_workers:
+            row = _get(row_queue, stop)
+            if row is _DONE:
+                num_parsers_done += 1
+            else:
+                event_rows.append(row)
+    except _PipelineStopped:
+        pass
+    finally:
+        # Stop the other stages too if collecting ended early
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    if errors:
+        raise errors[0]
+
+    log_parse_cache_stats(parser)
+    logger.info(
+        f"Pipeline parsed {counts['archived']} stored and {counts['fetched']} fetched pages "
+        f"to {len(event_rows)} events in {monotonic() - start:.1f} seconds"
+    )
+    return event_rows
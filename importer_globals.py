@@ -1,2 +1,44 @@
 SECONDS_TO_WAIT_BETWEEN_URL_READS = 10
 NUM_URL_TRIES = 3
+USER_AGENT = "PIANYC-Event-Importer/1.0 Non-commercial always links back to original (https://www.pianyc.net/about/)"
+HTTP_TIMEOUT_SECONDS = 30
+HTTP_POOL_SIZE = 10
+SELENIUM_POOL_SIZE = 1  # Number of browser drivers rendering pages at once
+POLITENESS_BURST = 1  # Requests to one host allowed back to back
+PAGE_CACHE_ENABLED = True  # Revalidate previously read pages with conditional GETs
+PAGE_CACHE_DIR = "../data/page_cache"
+PAGE_CACHE_MAX_BYTES = 500 * 1024 * 1024
+ROBOTS_CACHE_FILE = "../data/robots_cache.json"
+ROBOTS_CACHE_TTL_SECONDS = 24 * 60 * 60
+IMAGE_DOWNLOAD_WORKERS = 4  # Images downloaded at once in the background
+RETRY_BASE_DELAY_SECONDS = (
+    5.0  # Backoff before the second try, doubled for each later try
+)
+RETRY_MAX_DELAY_SECONDS = 120.0
+CIRCUIT_BREAKER_FAILURES = 5  # Consecutive failures after which a host is paused
+CIRCUIT_BREAKER_COOLDOWN_SECONDS = 300.0
+# Parsers with a READY_SELECTOR don't wait for scripts to finish, only for their element.
+# Other browser pages load with the "normal" strategy.
+SELENIUM_READY_PAGE_LOAD_STRATEGY = "eager"
+SELENIUM_BLOCKED_RESOURCE_TYPES = ("image", "font", "media", "tracking")
+SELENIUM_BLOCKED_URL_PATTERNS = ()  # Extra patterns, e.g., "*.example.com/ads/*"
+SELENIUM_READY_TIMEOUT_SECONDS = 15.0  # Longest wait for a parser's READY_SELECTOR
+BROWSER_HEADLESS = True
+BROWSER_PROFILE_DIR = (
+    "../data/browser_profiles"  # Keeps cookies and consent choices between runs
+)
+CHROMEDRIVER_CACHE_FILE = "../data/chromedriver_path.json"
+CHROMEDRIVER_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+PAGE_ARCHIVE_DICTIONARY_MIN_PAGES = 100  # Pages before a zstd dictionary is trained
+PAGE_ARCHIVE_DICTIONARY_RETRAIN_PAGES = 2000  # Pages stored before it is retrained
+# The parsers were written against html.parser. Those whose rows match with lxml (see
+# compare_parser_backends.py) opt in to it with their own HTML_PARSER_BACKEND.
+HTML_PARSER_BACKEND = "html.parser"
+PARSE_CACHE_ENABLED = True  # Reuse the events parsed from unchanged pages
+PARSE_CACHE_FILE = "../data/parse_cache.sqlite"
+FETCH_JOURNAL_MAX_TRIES = 3  # Runs in which a failing URL is tried
+PIPELINE_PARSE_WORKERS = 2  # Pages parsed at once while streaming
+PIPELINE_QUEUE_SIZE = 20  # Fetched pages that can wait to be parsed
+SITEMAP_STATE_FILE = (
+    "../data/sitemap_lastmod.json"  # Last <lastmod> seen for each sitemap URL
+)
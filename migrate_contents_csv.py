@@ -0,0 +1,81 @@
+"""
+Import the contents CSVs written by earlier versions of the importer into page archives.
+Each <venue>_event_contents.csv is imported into <venue>_event_pages.sqlite next to it; later
+rows for a URL replace earlier ones, as they did when the CSV was parsed.
+
+Usage: python migrate_contents_csv.py ../data/birdland_event_contents.csv [...]
+"""
+
+import argparse
+import csv
+import logging
+import os
+
+import importer_globals as G
+from FetchedPage import FetchedPage
+from PageArchive import PageArchive
+
+logger = logging.getLogger(__name__)
+
+CONTENTS_SUFFIX = "_event_contents.csv"
+ARCHIVE_SUFFIX = "_event_pages.sqlite"
+
+
+def archive_path_for(csv_path: str) -> str:
+    """Return the page archive path matching a contents CSV"""
+    if csv_path.endswith(CONTENTS_SUFFIX):
+        return csv_path[: -len(CONTENTS_SUFFIX)] + ARCHIVE_SUFFIX
+    return os.path.splitext(csv_path)[0] + ARCHIVE_SUFFIX
+
+
+def migrate_contents_csv(csv_path: str, archive_path: str) -> int:
+    """
+    Import the pages in a contents CSV into a page archive.
+
+    Args:
+        csv_path: Contents CSV to read
+        archive_path: Page archive to write, created if missing
+
+    Returns:
+        The number of rows imported
+    """
+    csv.field_size_limit(10000000)
+    page_archive = PageArchive(
+        archive_path,
+        G.PAGE_ARCHIVE_DICTIONARY_MIN_PAGES,
+        G.PAGE_ARCHIVE_DICTIONARY_RETRAIN_PAGES,
+    )
+    num_rows = 0
+    try:
+        with open(csv_path, encoding="utf-8") as event_page_file:
+            for row in csv.reader(event_page_file):
+                if not row:
+                    continue
+                page_archive.put(FetchedPage.from_contents_row(row))
+                num_rows += 1
+        logger.info(
+            f"Imported {num_rows} rows from {csv_path} to {archive_path}, "
+            f"which now has {page_archive.count()} pages"
+        )
+    finally:
+        page_archive.close()
+    return num_rows
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s|%(levelname)s|%(filename)s|%(funcName)s|%(lineno)d|%(message)s",
+    )
+    arg_parser = argparse.ArgumentParser(
+        description="Import contents CSVs into page archives"
+    )
+    arg_parser.add_argument("csv_paths", nargs="+", help="Contents CSVs to import")
+    arg_parser.add_argument(
+        "--archive",
+        help="Page archive to import into, instead of the one named after each CSV",
+    )
+    args = arg_parser.parse_args()
+
+    for csv_path in args.csv_paths:
+        migrate_contents_csv(csv_path, args.archive or archive_path_for(csv_path))
@@ -0,0 +1,105 @@
+from html.parser import HTMLParser
+
+from FetchedPage import markup_from_content
+
+# Elements whose contents aren't visible text
+HIDDEN_ELEMENTS = {"script", "style", "noscript", "template", "svg"}
+
+# Elements that have no end tag
+VOID_ELEMENTS = {
+    "area",
+    "base",
+    "br",
+    "col",
+    "embed",
+    "hr",
+    "img",
+    "input",
+    "link",
+    "meta",
+    "source",
+    "track",
+    "wbr",
+}
+
+# Attributes worth searching: selectors, links, image text and structured data
+SEARCHED_ATTRIBUTES = {
+    "id",
+    "class",
+    "href",
+    "src",
+    "alt",
+    "title",
+    "itemprop",
+    "itemtype",
+    "property",
+    "name",
+    "content",
+    "datetime",
+    "aria-label",
+}
+
+
+class _PageTextExtractor(HTMLParser):
+    """Collects a page's title, visible text and searched attribute values"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title: list[str] = []
+        self.text: list[str] = []
+        self.attributes: list[str] = []
+        self._open_elements: list[str] = []
+        self._hidden_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        for name, value in attrs:
+            if name in SEARCHED_ATTRIBUTES and value:
+                self.attributes.append(value)
+        if tag in VOID_ELEMENTS:
+            return
+        if tag in HIDDEN_ELEMENTS:
+            self._hidden_depth += 1
+        self._open_elements.append(tag)
+
+    def handle_endtag(self, tag):
+        if tag in self._open_elements:
+            # Close any elements left open inside this one
+            while self._open_elements:
+                open_tag = self._open_elements.pop()
+                if open_tag in HIDDEN_ELEMENTS:
+                    self._hidden_depth -= 1
+                if open_tag == tag:
+                    break
+
+    def handle_data(self, data):
+        if self._hidden_depth or not data.strip():
+            return
+        if self._open_elements and self._open_elements[-1] == "title":
+            self.title.append(data.strip())
+        else:
+            self.text.append(data.strip())
+
+
+def extract_page_text(body: bytes, content_type: str | None) -> tuple[str, str, str]:
+    """
+    Extract the searchable parts of a page.
+
+    Args:
+        body: Page as it was fetched
+        content_type: Content-Type the page was served with
+
+    Returns:
+        The page's title, its visible text and the values of its searched attributes
+    """
+    markup = markup_from_content(body, content_type)
+    if isinstance(markup, bytes):
+        markup = markup.decode("utf-8", errors="replace")
+
+    extractor = _PageTextExtractor()
+    extractor.feed(markup)
+    extractor.close()
+    return (
+        " ".join(extractor.title),
+        " ".join(extractor.text),
+        " ".join(extractor.attributes),
+    )
@@ -0,0 +1,108 @@
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from time import monotonic
+
+from PageArchive import PageArchive
+from parser_common_code import parse_page_to_event, share_location_checks
+from venues import venue_configurations
+
+logger = logging.getLogger(__name__)
+
+# Set in each worker process by _start_worker
+_worker_parser = None
+_worker_archive: PageArchive | None = None
+
+
+def _start_worker(
+    venue: str, archive_path: str, location_lock, last_location_check_time
+) -> None:
+    """
+    Set up a worker process: its logging, its venue's parser, its own archive connection, and the
+    location lookups' rate limit shared with the other workers
+    """
+    global _worker_parser, _worker_archive
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s|%(levelname)s|%(processName)s|%(filename)s|%(funcName)s|%(lineno)d|%(message)s",
+    )
+    _worker_parser = venue_configurations[venue].parser
+    _worker_archive = PageArchive(archive_path)
+    share_location_checks(location_lock, last_location_check_time)
+
+
+def _parse_url(url: str) -> tuple[str, dict | None, str | None]:
+    """
+    Parse one archived page in a worker process.
+
+    Returns:
+        The URL, the filtered event row (None if the page has no wanted event), and the error
+        that stopped the page from being parsed, if there was one
+    """
+    try:
+        page = _worker_archive.get(url)
+        if page is None:
+            return url, None, "Not in the page archive"
+        return url, parse_page_to_event(page, _worker_parser), None
+    except Exception as e:
+        logger.exception(f"Parsing {url} failed")
+        return url, None, f"{type(e).__name__}: {e}"
+
+
+def parse_pages_in_processes(
+    venue: str,
+    page_archive: PageArchive,
+    num_workers: int,
+    urls: list[str] | None = None,
+    chunk_size: int = 8,
+) -> list[dict]:
+    """
+    Parse the pages in a venue's page archive to event rows with a pool of worker processes.
+    Each worker builds its venue's parser once and reads the pages from the archive itself, so only
+    URLs and event rows pass between processes. Rows come back in archive order, so the import file
+    is the same as with one process. A page that fails to parse is logged and skipped.
+
+    Args:
+        venue: Venue whose parser the workers use
+        page_archive: The venue's page archive
+        num_workers: Number of worker processes
+        urls: URLs of the pages to parse; all pages if None
+        chunk_size: URLs sent to a worker at a time
+
+    Returns:
+        The filtered event rows
+    """
+    if urls is None:
+        urls = page_archive.urls()
+    logger.info(
+        f"Parsing {len(urls)} pages from {page_archive.archive_path} in {num_workers} processes"
+    )
+
+    start = monotonic()
+    event_rows = []
+    failed_urls = []
+    with ProcessPoolExecutor(
+        max_workers=num_workers,
+        initializer=_start_worker,
+        initargs=(
+            venue,
+            page_archive.archive_path,
+            multiprocessing.Lock(),
+            multiprocessing.RawValue("d", 0.0),
+        ),
+    ) as executor:
+        for url, event_row, error in executor.map(
+            _parse_url, urls, chunksize=chunk_size
+        ):
+            if error:
+                logger.info(f"Skipping {url}, which failed to parse: {error}")
+                failed_urls.append(url)
+            elif event_row:
+                event_rows.append(event_row)
+
+    logger.info(
+        f"Parsed {len(urls)} pages to {len(event_rows)} events in {monotonic() - start:.1f} seconds, "
+        f"{len(failed_urls)} pages failed"
+    )
+    return event_rows
@@ -1,19 +1,19 @@
 import codecs
+import collections
 import csv
 import datetime as dt
 import html
 import logging
+import multiprocessing
 import os
-import random
 import re
-import sys
+import threading
 import typing
-from http.cookiejar import CookieJar
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from time import sleep
+from time import sleep, time
 from urllib.parse import urlparse
-from urllib.request import HTTPCookieProcessor, Request, build_opener
-from urllib.robotparser import RobotFileParser
+from urllib.request import Request
 
 import mysql
 import requests
@@ -21,8 +21,23 @@ from bs4 import BeautifulSoup
 
 import importer_globals as G
 from basic_utils import clean_up_url
+from BrowserSessionFactory import BrowserSessionFactory
+from EventParser import FETCH_MODE_BROWSER, FETCH_MODE_HTTP, FETCH_MODE_QT
+from FetchJournal import FetchJournal
+from FetchedPage import FetchedPage, make_soup
+from HttpLoader import HttpLoader
+from IndexedSoup import IndexedSoup
+from ImageDownloader import ImageDownloader
 from LocationCache import LocationCache
-from SeleniumLoader import SeleniumLoader
+from PageArchive import PageArchive
+from PageCache import PageCache
+from ParseCache import ParseCache
+from PolitenessScheduler import PolitenessScheduler
+from Qt5RenderedSoup import Qt5RenderWorker, get_render_worker
+from retry_policy import CircuitBreaker, FetchError, RetryPolicy, call_with_retry
+from RobotsCache import RobotsCache
+from SeleniumLoaderPool import SeleniumLoaderPool
+from structured_data import decode_json_ld  # noqa: F401, imported from here by parsers
 from suggesting import suggest_tags
 
 MAX_PARSE_TRIES = 3
@@ -33,11 +48,35 @@ csv.field_size_limit(1000000)
 
 location_cache: LocationCache | None = None
 
-last_location_check_dt: dt.datetime | None = None
+# Lock held while checking a location, and the time of the last lookup, in seconds since the epoch
+# (0 before the first). Parse worker processes get ones shared by all workers from
+# share_location_checks, so the lookup service's rate limit holds across processes.
+location_lock = threading.Lock()
+last_location_check_time = multiprocessing.RawValue("d", 0.0)
 
 logger = logging.getLogger(__name__)
 
-selenium_loader: SeleniumLoader | None = None
+browser_session_factory: BrowserSessionFactory | None = None
+
+selenium_loader_pools: dict[str, SeleniumLoaderPool] = {}  # By page load strategy
+
+http_loader: HttpLoader | None = None
+
+page_cache: PageCache | None = None
+
+parse_cache: ParseCache | None = None
+
+page_loader_lock = threading.Lock()
+
+politeness_scheduler = PolitenessScheduler()
+
+circuit_breaker = CircuitBreaker(
+    G.CIRCUIT_BREAKER_FAILURES, G.CIRCUIT_BREAKER_COOLDOWN_SECONDS
+)
+
+robots_cache: RobotsCache | None = None
+
+image_downloader_pool: ImageDownloader | None = None
 
 # Event columns in the correct order for importing.
 # UNDERSTAND THIS BEFORE CHANGING THE ORDER.
@@ -93,8 +132,25 @@ def is_in_new_york(lat: float, lon: float, venue: str):
     :param lon:
     :return:
     """
+    # Parse workers share the location cache's connection and the lookup service's rate limit
+    with location_lock:
+        return _is_in_new_york(lat, lon, venue)
+
+
+def share_location_checks(lock, last_check_time) -> None:
+    """
+    Check locations under a lock and last lookup time shared with other processes
+    :param lock: multiprocessing.Lock held while checking a location
+    :param last_check_time: multiprocessing.RawValue("d") with the time of the last lookup
+    """
+    global location_lock
+    global last_location_check_time
+    location_lock = lock
+    last_location_check_time = last_check_time
+
+
+def _is_in_new_york(lat: float, lon: float, venue: str):
     global location_cache
-    global last_location_check_dt
     url = f"https://nominatim.openstreetmap.org/reverse?format=json&lat={lat}&lon={lon}"
 
     if not location_cache:
@@ -122,10 +178,8 @@ def is_in_new_york(lat: float, lon: float, venue: str):
 
     # Not in cache, so check the location
     MIN_SECONDS_TO_WAIT_SINCE_LAST_CHECK = 5
-    if last_location_check_dt is not None:
-        seconds_since_last_check = (
-            dt.datetime.now() - last_location_check_dt
-        ).total_seconds()
+    if last_location_check_time.value:
+        seconds_since_last_check = time() - last_location_check_time.value
         seconds_to_wait = (
             MIN_SECONDS_TO_WAIT_SINCE_LAST_CHECK - seconds_since_last_check
         )
@@ -139,9 +193,16 @@ def is_in_new_york(lat: float, lon: float, venue: str):
             "User-Agent": "PIANYC-Event-Checker-Bot/1.0 (+https://www.pianyc.net)"
         }
 
-        response = requests.get(url, headers=headers)
+        def look_up():
+            response = requests.get(
+                url, headers=headers, timeout=G.HTTP_TIMEOUT_SECONDS
+            )
+            response.raise_for_status()
+            return response
+
+        response = call_with_retry(look_up, url, get_retry_policy(), circuit_breaker)
         response_json = response.json()
-        last_location_check_dt = dt.datetime.now()
+        last_location_check_time.value = time()
     except Exception as e:
         logger.info(f"Error getting location from {url}: {e}")
         return False
@@ -164,7 +225,7 @@ def is_in_new_york(lat: float, lon: float, venue: str):
 def parse_file_to_soup(file_path):
     """Parse a URL and return the parsed DOM object"""
     page = Request.urlopen("file:///{0}".format(file_path))
-    soup = BeautifulSoup(page, "html.parser")
+    soup = make_soup(page)
     return soup
 
 
@@ -190,90 +251,241 @@ def sanitize_filename(filename: str) -> str:
     return sanitized
 
 
-def sleep_random(normal_seconds: int | None = None):
+def get_browser_session_factory() -> BrowserSessionFactory:
+    """Return the factory every code path uses to start a browser, creating it on first use"""
+    global browser_session_factory
+    if browser_session_factory is None:
+        browser_session_factory = BrowserSessionFactory(
+            G.BROWSER_HEADLESS,
+            G.BROWSER_PROFILE_DIR,
+            G.CHROMEDRIVER_CACHE_FILE,
+            G.CHROMEDRIVER_CACHE_TTL_SECONDS,
+        )
+    return browser_session_factory
+
+
+def get_page_loader(
+    fetch_mode: str = FETCH_MODE_BROWSER,
+    ready_selector: str | None = None,
+) -> SeleniumLoaderPool | HttpLoader | Qt5RenderWorker:
     """
-    Sleep a random amount of time, based on the globally set normal duration
+    Return the shared page loader for a fetch mode, creating it on first use. Browser pages with a
+    ready selector are read as soon as their element appears, so their drivers don't wait for the
+    page's scripts to finish. Other browser pages get drivers that wait for the whole page.
     """
-    if normal_seconds is None:
-        normal_seconds = G.SECONDS_TO_WAIT_BETWEEN_URL_READS
+    global http_loader
+    global page_cache
+
+    with page_loader_lock:
+        if fetch_mode == FETCH_MODE_HTTP:
+            if http_loader is None:
+                if G.PAGE_CACHE_ENABLED and page_cache is None:
+                    page_cache = PageCache(G.PAGE_CACHE_DIR, G.PAGE_CACHE_MAX_BYTES)
+                http_loader = HttpLoader(page_cache=page_cache)
+            return http_loader
+        elif fetch_mode == FETCH_MODE_BROWSER:
+            if ready_selector:
+                page_load_strategy = G.SELENIUM_READY_PAGE_LOAD_STRATEGY
+            else:
+                page_load_strategy = "normal"
+            if page_load_strategy not in selenium_loader_pools:
+                # A listing crawl and its event pages can use both pools, so each has its
+                # own browser profiles
+                if page_load_strategy == "normal":
+                    profile_prefix = "pool"
+                else:
+                    profile_prefix = f"pool-{page_load_strategy}"
+                selenium_loader_pools[page_load_strategy] = SeleniumLoaderPool(
+                    G.SELENIUM_POOL_SIZE,
+                    False,
+                    profile_prefix,
+                    page_load_strategy=page_load_strategy,
+                    blocked_resource_types=G.SELENIUM_BLOCKED_RESOURCE_TYPES,
+                    blocked_url_patterns=G.SELENIUM_BLOCKED_URL_PATTERNS,
+                    ready_timeout_seconds=G.SELENIUM_READY_TIMEOUT_SECONDS,
+                    session_factory=get_browser_session_factory(),
+                )
+            return selenium_loader_pools[page_load_strategy]
+        elif fetch_mode == FETCH_MODE_QT:
+            return get_render_worker()
+        else:
+            raise ValueError(f'Invalid fetch mode: "{fetch_mode}"')
+
+
+def get_retry_policy() -> RetryPolicy:
+    """Return the retry policy for network calls, using the number of tries set for this venue"""
+    return RetryPolicy(
+        max_tries=G.NUM_URL_TRIES,
+        base_delay=G.RETRY_BASE_DELAY_SECONDS,
+        max_delay=G.RETRY_MAX_DELAY_SECONDS,
+    )
+
 
-    if normal_seconds > 0:
-        seconds_to_wait = random.triangular(
-            normal_seconds * 0.5, normal_seconds * 1.5, normal_seconds
+def get_robots_cache() -> RobotsCache:
+    """Return the shared robots.txt cache, creating it on first use"""
+    global robots_cache
+
+    if robots_cache is None:
+        robots_cache = RobotsCache(
+            G.ROBOTS_CACHE_FILE,
+            G.ROBOTS_CACHE_TTL_SECONDS,
+            get_page_loader(FETCH_MODE_HTTP).session,
+            get_retry_policy(),
+            circuit_breaker,
         )
-        if seconds_to_wait > 0:
-            logger.info(f"Waiting {seconds_to_wait:1f} seconds before first try")
-            sleep(seconds_to_wait)
-            logger.info("Resuming")
+    return robots_cache
 
 
-def parse_url_to_soup(url, image_downloader=None, wait_first_try=True):
-    """Parse a URL and return the parsed DOM object"""
+def get_parse_cache() -> ParseCache | None:
+    """Return the shared parse result cache, creating it on first use, or None if it is disabled"""
+    global parse_cache
 
-    global selenium_loader
-    if selenium_loader is None:
-        selenium_loader = SeleniumLoader(False)
+    if not G.PARSE_CACHE_ENABLED:
+        return None
+    with page_loader_lock:
+        if parse_cache is None:
+            parse_cache = ParseCache(G.PARSE_CACHE_FILE)
+    return parse_cache
+
+
+def get_image_downloader() -> ImageDownloader:
+    """Return the shared background image downloader, creating it on first use"""
+    global image_downloader_pool
+
+    http_loader = get_page_loader(FETCH_MODE_HTTP)
+    with page_loader_lock:
+        if image_downloader_pool is None:
+            image_downloader_pool = ImageDownloader(
+                http_loader,
+                G.IMAGE_DOWNLOAD_WORKERS,
+                get_retry_policy(),
+                circuit_breaker,
+                politeness_scheduler,
+            )
+    return image_downloader_pool
 
-    # For sensitive websites, wait to avoid being blocked
-    if wait_first_try:
-        sleep_random()
 
-    soup = None
-    for i in range(G.NUM_URL_TRIES):
-        try:
-            soup = selenium_loader.soup_from_url(url)
-            if not soup:
-                logger.info("Selenium loader failed")
-                continue
+def render_url_with_cache(
+    url: str, raise_errors: bool = False, ready_selector: str | None = None
+) -> FetchedPage | None:
+    """
+    Render a page in the browser, unless a conditional request shows that the cached
+    render of the page is still current. The conditional request is only sent for a cached
+    render with validators. A page rendered for the first time has its validators read once
+    after the render, and is cached even without any so it isn't checked again.
+    Each request waits for a turn with the politeness scheduler.
+    """
+    loader = get_page_loader(FETCH_MODE_HTTP)
+    page_cache = loader.page_cache
+    cached_page = None
+    if page_cache is not None:
+        cached_page = page_cache.lookup(url, FETCH_MODE_BROWSER)
+    validators = None
+    if cached_page is not None and (cached_page.etag or cached_page.last_modified):
+        politeness_scheduler.wait_for_turn(url)
+        not_modified, validators = loader.check_not_modified(
+            url, cached_page, FETCH_MODE_BROWSER
+        )
+        if not_modified:
+            return cached_page.fetched_page(url)
+    elif cached_page is not None:
+        page_cache.increment("misses")
+
+    politeness_scheduler.wait_for_turn(url)
+    page = get_page_loader(FETCH_MODE_BROWSER, ready_selector).page_from_url(
+        url, raise_errors, ready_selector
+    )
+    if page and page_cache is not None and cached_page is None:
+        politeness_scheduler.wait_for_turn(url)
+        _, validators = loader.check_not_modified(url, None, FETCH_MODE_BROWSER)
+    # Validators are None if there are none to check or the request for them failed
+    if page and validators is not None:
+        page_cache.store(page, FETCH_MODE_BROWSER, validators)
+    return page
+
+
+def parse_url_to_soup(
+    url,
+    image_downloader=None,
+    wait_first_try=True,
+    fetch_mode=FETCH_MODE_BROWSER,
+    ready_selector=None,
+):
+    """Parse a URL and return the parsed DOM object.
+    In browser mode, ready_selector is a CSS selector for an element whose presence shows that the page's
+    data has rendered.
+    """
+    page = fetch_url_to_page(
+        url, image_downloader, wait_first_try, fetch_mode, ready_selector
+    )
+    return page.soup() if page else None
+
+
+def fetch_url_to_page(
+    url,
+    image_downloader=None,
+    wait_first_try=True,
+    fetch_mode=FETCH_MODE_BROWSER,
+    ready_selector=None,
+    raise_errors=False,
+) -> FetchedPage | None:
+    """Read a URL and return the page as it was sent (or rendered), with its fetch metadata.
+    Takes the same arguments as parse_url_to_soup. With raise_errors, a URL that can't be read raises
+    the last error instead of returning None.
+    """
 
-            if image_downloader:
-                # This parser requires downloading the featured image, probably because the server does not allow
-                # linking directly from our page.
-                # We will upload these files to our server before whe importing the events CSV.
-                folder, image_file_name, image_url = image_downloader(soup)
-                if image_file_name:
-                    image_file_name = sanitize_filename(image_file_name)
-                    full_image_path = get_full_image_path(folder, image_file_name)
-                    if folder and image_file_name and image_url:
-                        if not os.path.isfile(full_image_path):
-                            # Read the image file from the server and store it as a file on the local drive
-                            user_agent = "Mozilla/5.0 (Windows NT 6.1; Win64; x64; rv:73.0) Gecko/20100101 Firefox/73.0"
-                            headers = {"User-Agent": f"{user_agent}"}
-                            cookie_jar = CookieJar()
-                            opener = build_opener(HTTPCookieProcessor(cookie_jar))
-
-                            image_req = Request(image_url, headers=headers)
-                            image = opener.open(image_req)
-                            raw_image_data = image.read()
-                            image.close()
-                            with open(full_image_path, "wb") as saved_image_file:
-                                logger.info(f"Saving image {full_image_path}")
-                                saved_image_file.write(raw_image_data)
-                        else:
-                            logger.info(f"Image {full_image_path} already exists")
-                else:
-                    logger.info("No image file name")
-        except Exception as ex:
+    page_loader = get_page_loader(fetch_mode, ready_selector)
+
+    # For sensitive websites, wait to avoid being blocked. A cached render waits for a turn
+    # before each of its requests itself.
+    render_with_cache = fetch_mode == FETCH_MODE_BROWSER and G.PAGE_CACHE_ENABLED
+    if wait_first_try and not render_with_cache:
+        politeness_scheduler.wait_for_turn(url)
+
+    def load_page():
+        if fetch_mode == FETCH_MODE_HTTP:
+            page = page_loader.page_from_url(url, raise_errors=True)
+        elif render_with_cache:
+            page = render_url_with_cache(url, True, ready_selector)
+        else:
+            page = page_loader.page_from_url(url, True, ready_selector)
+        if not page or not page.body:
+            raise FetchError(f"{type(page_loader).__name__} returned no page")
+        return page
+
+    try:
+        page = call_with_retry(load_page, url, get_retry_policy(), circuit_breaker)
+    except Exception as ex:
+        if raise_errors:
             raise
-            logger.info(f"Unable to open URL {url}: {ex}")
-            if i <= (G.NUM_URL_TRIES - 2):
-                logger.info(f"Waiting before try {i + 2} of {G.NUM_URL_TRIES}")
-                sleep_random()
-                logger.info("Retrying")
-                continue
-            logger.info("URL read failed")
-            return None
+        logger.info(f"URL read failed for {url}: {ex}")
+        return None
+
+    if image_downloader:
+        # This parser requires downloading the featured image, probably because the server does not allow
+        # linking directly from our page.
+        # We will upload these files to our server before whe importing the events CSV.
+        try:
+            folder, image_file_name, image_url = image_downloader(page.soup())
+        except Exception as ex:
+            logger.info(f"Unable to parse image URL from {url}: {ex}")
+            folder = image_file_name = image_url = None
+        if image_file_name:
+            image_file_name = sanitize_filename(image_file_name)
+            full_image_path = get_full_image_path(folder, image_file_name)
+            if folder and image_file_name and image_url:
+                # Read the image file from the server in the background and store it
+                # as a file on the local drive
+                get_image_downloader().submit(full_image_path, image_url)
         else:
-            if i > 0:
-                logger.info(f"Try {i + 1} succeeded.")
-            break
+            logger.info("No image file name")
 
-    return soup
+    return page
 
 
 def parse_html_to_soup(html):
     """Parse a URL and return the parsed DOM object"""
-    soup = BeautifulSoup(html, "html.parser")
+    soup = make_soup(html)
     return soup
 
 
@@ -299,61 +511,6 @@ def any_match(needles: typing.Iterable[str], haystacks: typing.Iterable[str]):
     return False
 
 
-def check_contents_file(file_name: str) -> list[str] | None:
-    """Check whether the event contents file exists"""
-    if not os.path.exists(file_name):
-        # File does not exist
-        return []
-
-    # Since the file is a CSV file, open it as a CSV file and check how many lines it has
-    with open(file_name, encoding="utf-8") as event_page_file:
-        csv_reader = csv.reader(event_page_file)
-
-        # Read the last row to get the URL
-        event_page_file.seek(0)
-        all_rows = list(csv_reader)
-        all_non_empty_rows = [row for row in all_rows if row != []]
-        last_row = all_non_empty_rows[-1]
-
-    # The number of existing events is the number of non-empty rows minus one for the header row
-    num_events = len(all_non_empty_rows) - 1
-
-    # The URL is the first element in the row
-    last_url = last_row[0]
-
-    # Offer three options: 1) quit 2) append to the file, or 3) overwrite the file
-    logger.info(f"Contents file {file_name} already exists with {num_events} events.")
-    logger.info(f"Last URL in file: {last_url}")
-    logger.info("Options:")
-    logger.info("q) Quit")
-    logger.info("a) Append to the file")
-    logger.info("o) Overwrite the file")
-    response = input("q/a/o: ")
-    if response == "q":
-        logger.info(f"File {file_name} already exists. Quitting.")
-        # Quit the program
-        sys.exit(1)
-
-    elif response == "a":
-        # Appending to file
-        if len(all_non_empty_rows) > len(all_rows):
-            # To remove any empty rows at the end of the file, write all non-empty rows back to the file
-            with open(
-                file_name, "w", encoding="utf-8", newline="\n"
-            ) as event_page_file:
-                writer = csv.writer(event_page_file)
-                for row in all_non_empty_rows:
-                    writer.writerow(row)
-        all_urls = [row[0] for row in all_non_empty_rows]
-        return all_urls
-    elif response == "o":
-        os.remove(file_name)
-        logger.info(f"File {file_name} deleted")
-        return []
-    else:
-        raise RuntimeError(f"Invalid response {response}")
-
-
 def manually_input_page(url: str) -> BeautifulSoup:
     # Print the URL to inform the user
     logger.info("Please paste the contents of the web page for URL:", url)
@@ -372,19 +529,38 @@ def manually_input_page(url: str) -> BeautifulSoup:
     html_content = "\n".join(content)
 
     # Parse the HTML content with BeautifulSoup
-    soup = BeautifulSoup(html_content, "html.parser")
+    soup = make_soup(html_content)
 
     # Return the BeautifulSoup object
     return soup
 
 
-def write_pages_to_soup_file(urls, page_file_path, parser):
-    """Parse all the URLs to pages and save them."""
+def fetch_pages(
+    urls,
+    parser,
+    fetch_journal: FetchJournal | None = None,
+    seconds_per_request: float | None = None,
+    burst: int | None = None,
+) -> typing.Iterator[FetchedPage]:
+    """
+    Fetch the pages for a list of URLs, yielding them in URL order.
+    Only a bounded number of pages are fetched ahead of the caller, so a slow consumer holds fetching back.
+    :param urls: (number of URLs, URL) pairs
+    :param parser: parser the pages are fetched for
+    :param fetch_journal: journal to record each URL's outcome in. A page is recorded as fetched
+        once the caller asks for the next page, so it has been stored by then.
+    :param seconds_per_request: venue's spacing between requests to a host; None for the default
+    :param burst: venue's requests to a host allowed back to back; None for the default
+    """
+    if seconds_per_request is None:
+        seconds_per_request = G.SECONDS_TO_WAIT_BETWEEN_URL_READS
+    if burst is None:
+        burst = G.POLITENESS_BURST
 
-    # Assume all URLs belong to the same domain
-    num_lines_written = 0
-    first_row = True
-    user_agent = "PIANYC-Event-Importer/1.0 Non-commercial always links back to original (https://www.pianyc.net/about/)"
+    user_agent = G.USER_AGENT
+    fetch_mode = parser.FETCH_MODE
+    ready_selector = parser.READY_SELECTOR
+    logger.info(f"Fetching pages in {fetch_mode} mode")
 
     if hasattr(parser, "parse_image_url"):
         image_parser = parser.parse_image_url
@@ -397,122 +573,231 @@ def write_pages_to_soup_file(urls, page_file_path, parser):
         urls_temp.append((num_urls, url))
     urls = urls_temp
 
-    robot_parser = None
+    # robots.txt is read once per host and shared across runs through the robots cache
+    robots = get_robots_cache()
+    urls_to_fetch: list[tuple[int, int, str]] = []
+    num_disallowed = 0
     for i, (num_urls, url) in enumerate(urls):
         if not url.strip():
             continue
 
-        if robot_parser is None:
-            # Extract the domain and initialize RobotFileParser once
-            parsed_url = urlparse(url)
-            domain = parsed_url.netloc
-            robots_url = f"{parsed_url.scheme}://{domain}/robots.txt"
-            logger.info(f"Fetching robots.txt for {domain}: {robots_url}")
-
-            robot_parser = RobotFileParser(robots_url)
-            try:
-                robot_parser.read()
-            except Exception as e:
-                logger.info(f"Error fetching robots.txt: {e}")
-                robot_parser = (
-                    None  # Default to allowing crawling if robots.txt is inaccessible
-                )
-
         # Skip URLs that are disallowed by the robots.txt file
-        if robot_parser and not robot_parser.can_fetch(user_agent, url):
+        if not robots.can_fetch(user_agent, url):
             logger.info(f"Disallowed URL {url}")
-            # continue
+            num_disallowed += 1
+            if fetch_journal:
+                fetch_journal.mark_filtered(url, "Disallowed by robots.txt")
+            continue
 
+        urls_to_fetch.append((i, num_urls, url))
+
+    if num_disallowed:
+        logger.info(f"Skipped {num_disallowed} URLs disallowed by robots.txt")
+
+    def fetch(url_to_fetch: tuple[int, int, str]):
+        i, num_urls, url = url_to_fetch
         logger.info(f"Processing URL {i + 1}/{num_urls}, {url}")
 
-        # Parse the HTML content with BeautifulSoup
-        soup = parse_url_to_soup(url, image_parser, not first_row)
-        first_row = False
+        try:
+            return fetch_url_to_page(
+                url, image_parser, True, fetch_mode, ready_selector, raise_errors=True
+            )
+        except Exception as ex:
+            logger.info(f"URL read failed for {url}: {ex}")
+            if fetch_journal:
+                fetch_journal.mark_failed(url, f"{type(ex).__name__}: {ex}")
+            return None
+
+    # Each host gets its own token bucket at the rate and burst set for this venue,
+    # slowed down further if its robots.txt asks for a longer crawl delay
+    host_urls = {urlparse(url).netloc: url for _, _, url in urls_to_fetch}
+    for host, url in sorted(host_urls.items()):
+        seconds_to_wait = seconds_per_request
+        crawl_delay = robots.crawl_delay(user_agent, url)
+        if crawl_delay is not None and crawl_delay > seconds_to_wait:
+            logger.info(f"Using crawl delay of {crawl_delay} seconds for {host}")
+            seconds_to_wait = crawl_delay
+        politeness_scheduler.configure_host(host, seconds_to_wait, burst)
+
+    # Render several pages at once. Requests to the same host are still spaced out by
+    # the politeness scheduler, and results come back in URL order.
+    page_loader = get_page_loader(fetch_mode, ready_selector)
+    if fetch_mode == FETCH_MODE_BROWSER:
+        num_workers = G.SELENIUM_POOL_SIZE
+    elif fetch_mode == FETCH_MODE_QT:
+        num_workers = 1  # The Qt renderer renders one page at a time
+    else:
+        num_workers = G.HTTP_POOL_SIZE
 
-        if soup:
-            # Allow parsers to filter out unwanted events
-            if hasattr(parser, "content_filter"):
-                soup = parser.content_filter(soup)
-            if not soup:
-                continue
+    executor = ThreadPoolExecutor(max_workers=num_workers)
+    pending: collections.deque[Future] = collections.deque()
+    remaining_urls = iter(urls_to_fetch)
+    try:
+        while True:
+            while len(pending) < 2 * num_workers:
+                url_to_fetch = next(remaining_urls, None)
+                if url_to_fetch is None:
+                    break
+                pending.append(executor.submit(fetch, url_to_fetch))
+            if not pending:
+                break
+
+            page = pending.popleft().result()
+            if page:
+                # Allow parsers to filter out unwanted events. The page is kept as it was read.
+                if hasattr(parser, "content_filter") and not parser.content_filter(
+                    page.soup()
+                ):
+                    if fetch_journal:
+                        fetch_journal.mark_filtered(
+                            page.url, "Rejected by content filter"
+                        )
+                    continue
+                yield page
+                if fetch_journal:
+                    fetch_journal.mark_fetched(page.url)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        log_fetch_stats(page_loader)
+
+
+def log_fetch_stats(page_loader) -> None:
+    """Log the loader and cache stats, after waiting for background image downloads"""
+    if isinstance(page_loader, SeleniumLoaderPool):
+        logger.info(f"Browser pool stats: {page_loader.stats()}")
+    if page_cache is not None:
+        logger.info(f"Page cache stats: {page_cache.stats()}")
+    if image_downloader_pool is not None:
+        logger.info("Waiting for image downloads to finish")
+        image_downloader_pool.wait()
+        logger.info(f"Image download summary: {image_downloader_pool.summary()}")
+
+
+def write_pages_to_archive(
+    urls,
+    page_archive: PageArchive,
+    parser,
+    fetch_journal: FetchJournal | None = None,
+    seconds_per_request: float | None = None,
+    burst: int | None = None,
+):
+    """Parse all the URLs to pages and save them. The rate arguments are as for fetch_pages."""
 
-            # Open and append to the page file for each loop, so
-            # we don't lose data if a website call never returns
-            with open(page_file_path, "a", encoding="utf-8") as event_page_file:
-                writer = csv.writer(event_page_file)
-                if first_row:
-                    writer.writerow(("url", "soup"))
-                writer.writerow((url, soup_to_str(soup)))
-                num_lines_written += 1
+    num_pages_written = 0
+    for page in fetch_pages(urls, parser, fetch_journal, seconds_per_request, burst):
+        # Each page is committed as it arrives, so
+        # we don't lose data if a website call never returns
+        page_archive.put(page)
+        num_pages_written += 1
 
-    logger.info(f"Completed writing {num_lines_written} pages to {page_file_path}")
+    logger.info(
+        f"Completed writing {num_pages_written} pages to {page_archive.archive_path}"
+    )
     return
 
 
-def parse_pages_to_events(page_file_path, parser):
+def parse_pages_to_events(
+    page_archive: PageArchive, parser, urls: list[str] | None = None
+):
     """
-    Parse a stored CSV file with urls and pages to a list of event rows
-    :param page_file_path: file containing stored event listings
+    Parse the pages in a page archive to a list of event rows
+    :param page_archive: archive containing stored event pages
     :param parser: parser to use when decoding the pages
+    :param urls: URLs of the pages to parse, e.g., from PageArchive.search(); all pages if None
     :return: list of event rows (dictionaries)
     """
 
     event_rows = []
 
-    # Read through the file and count the number of rows, accounting for the header row
-    num_rows = 0
-    with open(page_file_path, encoding="utf-8") as event_page_file:
-        csv.field_size_limit(10000000)
-        csv_reader = csv.reader(event_page_file)
-        for loop, row in enumerate(csv_reader):
-            if not row:
+    logger.info(f"Found {page_archive.count()} pages in {page_archive.archive_path}")
+
+    # Read through the archive and parse the pages
+    logger.info(f"Parsing pages from {page_archive.archive_path}")
+    if urls is None:
+        pages = page_archive.pages()
+    else:
+        pages = (page for url in urls if (page := page_archive.get(url)))
+    for loop, page in enumerate(pages):
+        if False:  # Limit rows, for test imports
+            if not 0 < loop <= 7:
                 continue
-            num_rows += 1
 
-    logger.info(f"Found {num_rows} rows in {page_file_path}")
+        event_row = parse_page_to_event(page, parser)
+        if not event_row:
+            continue
 
-    # Read through the file and parse the pages
-    logger.info(f"Parsing pages from {page_file_path}")
-    with open(page_file_path, encoding="utf-8") as event_page_file:
-        csv.field_size_limit(10000000)
-        csv_reader = csv.reader(event_page_file)
-        for loop, row in enumerate(csv_reader):
-            if not row:
+        if False:
+            # Accept events only in an acceptable time window
+            # Compare with two datetime objects, one at the earliest permitted time, and one at the latest
+            earliest_permitted_time = dt.datetime(year=2025, month=3, day=1)
+            latest_permitted_time = dt.datetime(year=2030, month=3, day=1)
+            if not (
+                earliest_permitted_time
+                <= event_row["start_timestamp"]
+                < latest_permitted_time
+            ):
+                logger.info(
+                    f"Skipping event not in time window: {event_row['start_timestamp']}"
+                )
                 continue
 
-            if False:  # Limit rows, for test imports
-                if not 0 < loop <= 7:
-                    continue
+        event_rows.append(event_row)
 
-            url, html = row
-            url = url.strip()  # Remove ending newline
-            logger.info(f"Parsing page from {url}")
-            soup = BeautifulSoup(html, "html.parser")
-            event_row = parser.parse_soup_to_event(url, soup)
-            if not event_row:
-                continue
-            event_row = filter_event_row(event_row)
-            if not event_row:
-                continue
+    log_parse_cache_stats(parser)
+    return event_rows
 
-            if False:
-                # Accept events only in an acceptable time window
-                # Compare with two datetime objects, one at the earliest permitted time, and one at the latest
-                earliest_permitted_time = dt.datetime(year=2025, month=3, day=1)
-                latest_permitted_time = dt.datetime(year=2030, month=3, day=1)
-                if not (
-                    earliest_permitted_time
-                    <= event_row["start_timestamp"]
-                    < latest_permitted_time
-                ):
-                    logger.info(
-                        f"Skipping event not in time window: {event_row['start_timestamp']}"
-                    )
-                    continue
 
-            event_rows.append(event_row)
+def parser_soup(page: FetchedPage, parser, backend: str | None = None):
+    """
+    Return the soup a parser parses a page from: only its PARSE_ONLY regions, indexed if it
+    sets INDEXED_SOUP
+    :param page: page to parse
+    :param parser: parser the soup is for
+    :param backend: tree builder to use instead of the parser's HTML_PARSER_BACKEND
+    :return: the soup, or an IndexedSoup of it
+    """
+    soup = page.soup(backend or parser.HTML_PARSER_BACKEND, parser.PARSE_ONLY)
+    if parser.INDEXED_SOUP:
+        soup = IndexedSoup(soup)
+    return soup
 
-    return event_rows
+
+def parse_page_to_event(page: FetchedPage, parser) -> dict | None:
+    """
+    Parse one page to an event row and filter it
+    :param page: page read from its URL or from the page archive
+    :param parser: parser to use when decoding the page
+    :return: event row, or None if the page has no wanted event
+    """
+    # An unchanged page parsed by unchanged code gives the same row, so the parse is reused.
+    # Filtering depends on today's date, so it is always done again.
+    cache = get_parse_cache()
+    found = False
+    if cache is not None:
+        found, event_row = cache.lookup(page, parser)
+    if not found:
+        logger.info(f"Parsing page from {page.url}")
+        if parser.STRUCTURED_DATA_ONLY:
+            event_row = parser.parse_structured_data_to_event(
+                page.url, page.structured_data()
+            )
+        else:
+            event_row = parser.parse_soup_to_event(page.url, parser_soup(page, parser))
+        # Pages without an event aren't stored. Parsers also reject pages on lookups that can fail or
+        # change between runs, e.g., EventBriteParser_v2's geocoding and venue database checks.
+        if cache is not None and event_row:
+            cache.store(page, parser, event_row)
+    if not event_row:
+        return None
+    return filter_event_row(event_row)
+
+
+def log_parse_cache_stats(parser) -> None:
+    """Log how many pages were parsed and how many had their parse reused"""
+    if parse_cache is not None:
+        logger.info(
+            f"Parse cache stats for {type(parser).__name__}: {parse_cache.stats()}"
+        )
 
 
 def serve_pages_from_file(file_name):
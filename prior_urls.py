@@ -7,7 +7,7 @@ from basic_utils import clean_up_urls
 # This is done when we are saving the csv file for uploading to the website
 def append_to_prior_urls_file(urls: list[str], file_name: str) -> None:
     # Read the existing URLs from the file
-    existing_urls = _read_urls_from_file(file_name)
+    existing_urls = read_prior_urls(file_name)
 
     # Combine the existing URLs with the new URLs
     all_urls = clean_up_urls(sorted(list(set(existing_urls + urls))))
@@ -22,13 +22,13 @@ def append_to_prior_urls_file(urls: list[str], file_name: str) -> None:
 # Take a list of URLs and remove ones that are already in the file
 # This is done when we are about to scrape websites and want to avoid scraping URLs we have already scraped
 def remove_existing_urls(urls: list[str], file_name: str) -> list[str]:
-    existing_urls = clean_up_urls(_read_urls_from_file(file_name))
+    existing_urls = clean_up_urls(read_prior_urls(file_name))
     urls = clean_up_urls(urls)
     return sorted(list(set(urls) - set(existing_urls)))
 
 
-# Read a list of URLs from a file
-def _read_urls_from_file(file_name: str) -> list[str]:
+# Read the URLs scraped in earlier runs for a URL file
+def read_prior_urls(file_name: str) -> list[str]:
     prior_file_name = _create_prior_file_name(file_name)
 
     try:
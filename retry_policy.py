@@ -0,0 +1,217 @@
+import datetime as dt
+import logging
+import random
+import threading
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from time import monotonic, sleep
+from typing import Callable, TypeVar
+from urllib.parse import urlparse
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# HTTP statuses worth trying again; every other error status is final
+RETRYABLE_STATUS_CODES = (408, 425, 429, 500, 502, 503, 504)
+
+
+class FetchError(Exception):
+    """A fetch failed without a more specific error, e.g., the browser returned no page"""
+
+
+class CircuitOpenError(Exception):
+    """Requests to a host are suspended because it keeps failing"""
+
+
+@dataclass
+class RetryPolicy:
+    """Exponential backoff with jitter"""
+
+    max_tries: int = 3
+    base_delay: float = 5.0  # Seconds before the second try
+    max_delay: float = 120.0  # Longest backoff between tries
+    jitter: float = (
+        0.5  # Each delay is scaled by a random factor in [1 - jitter, 1 + jitter]
+    )
+    max_retry_after: float = 600.0  # Longest Retry-After delay that will be honored
+
+    def delay_before_retry(
+        self, try_number: int, retry_after: float | None = None
+    ) -> float:
+        """
+        Return the seconds to wait after a failed try.
+
+        Args:
+            try_number: Number of the try that failed, starting at 1
+            retry_after: Delay requested by the server, if any
+        """
+        delay = min(self.max_delay, self.base_delay * 2 ** (try_number - 1))
+        delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_retry_after))
+        return delay
+
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker. After a number of consecutive failures, requests to the host are
+    refused for a cooldown period. Once the cooldown is over, one request is let through to test
+    the host: success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, cooldown_seconds: float = 300.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._lock = threading.Lock()
+        self._failures: dict[str, int] = {}
+        self._open_until: dict[str, float] = {}
+        # Host of each trial request in progress, and the thread making it
+        self._trial_in_progress: dict[str, int] = {}
+
+    def allow(self, host: str) -> bool:
+        """Return whether a request to the host may go out now"""
+        with self._lock:
+            open_until = self._open_until.get(host)
+            if open_until is None:
+                return True
+            if monotonic() < open_until or host in self._trial_in_progress:
+                return False
+            # Cooldown is over: let one trial request through
+            self._trial_in_progress[host] = threading.get_ident()
+            return True
+
+    def record_success(self, host: str) -> None:
+        with self._lock:
+            self._failures.pop(host, None)
+            self._open_until.pop(host, None)
+            self._trial_in_progress.pop(host, None)
+
+    def record_failure(self, host: str) -> None:
+        with self._lock:
+            failures = self._failures[host] = self._failures.get(host, 0) + 1
+            if failures >= self.failure_threshold or host in self._trial_in_progress:
+                logger.info(
+                    f"{host} failed {failures} times in a row, "
+                    f"pausing requests to it for {self.cooldown_seconds} seconds"
+                )
+                self._open_until[host] = monotonic() + self.cooldown_seconds
+                self._trial_in_progress.pop(host, None)
+
+    def end_trial(self, host: str) -> None:
+        """End the current thread's trial request to the host, if it is making one"""
+        with self._lock:
+            if self._trial_in_progress.get(host) == threading.get_ident():
+                del self._trial_in_progress[host]
+
+
+def is_retryable(ex: Exception) -> bool:
+    """Classify an error as worth retrying (transient) or fatal"""
+    if isinstance(ex, CircuitOpenError):
+        return False
+    if isinstance(ex, FetchError):
+        return True
+    if isinstance(ex, requests.HTTPError):
+        return (
+            ex.response is not None
+            and ex.response.status_code in RETRYABLE_STATUS_CODES
+        )
+    if isinstance(ex, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if type(ex).__module__.startswith("selenium"):
+        # Browser timeouts and driver hiccups
+        return True
+    return isinstance(ex, (ConnectionError, TimeoutError))
+
+
+def retry_after_seconds(ex: Exception) -> float | None:
+    """Return the delay requested by a Retry-After header on an HTTP error, if any"""
+    response = getattr(ex, "response", None)
+    if response is None:
+        return None
+    retry_after = response.headers.get("Retry-After")
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        retry_dt = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    if retry_dt.tzinfo is None:
+        retry_dt = retry_dt.replace(tzinfo=dt.timezone.utc)
+    return max(0.0, (retry_dt - dt.datetime.now(dt.timezone.utc)).total_seconds())
+
+
+def call_with_retry(
+    func: Callable[[], T],
+    url: str,
+    policy: RetryPolicy | None = None,
+    circuit_breaker: CircuitBreaker | None = None,
+) -> T:
+    """
+    Call a network function, retrying transient errors with backoff.
+
+    Args:
+        func: Function doing the request
+        url: URL being requested, for logging and for the circuit breaker's host
+        policy: Retry policy, or None for the defaults
+        circuit_breaker: Circuit breaker to consult and update, if any
+
+    Returns:
+        The function's result
+
+    Raises:
+        CircuitOpenError: The host's circuit is open
+        Exception: The last error, if it was fatal or the tries ran out
+    """
+    if policy is None:
+        policy = RetryPolicy()
+    host = urlparse(url).netloc
+
+    try:
+        for try_number in range(1, policy.max_tries + 1):
+            if circuit_breaker is not None and not circuit_breaker.allow(host):
+                raise CircuitOpenError(f"Requests to {host} are paused")
+
+            try:
+                result = func()
+            except Exception as ex:
+                retryable = is_retryable(ex)
+                if circuit_breaker is not None:
+                    if retryable:
+                        circuit_breaker.record_failure(host)
+                    elif isinstance(ex, requests.HTTPError):
+                        # The host answered; the request itself was bad
+                        circuit_breaker.record_success(host)
+                if not retryable:
+                    logger.info(f"Unable to read {url}: {ex}")
+                    raise
+                if try_number == policy.max_tries:
+                    logger.info(f"Unable to read {url} after {try_number} tries: {ex}")
+                    raise
+
+                if circuit_breaker is not None and not circuit_breaker.allow(host):
+                    # Don't sleep on a host that has just been paused
+                    raise CircuitOpenError(f"Requests to {host} are paused") from ex
+
+                delay = policy.delay_before_retry(try_number, retry_after_seconds(ex))
+                logger.info(
+                    f"Try {try_number} of {policy.max_tries} for {url} failed ({ex}), "
+                    f"waiting {delay:.1f} seconds"
+                )
+                sleep(delay)
+            else:
+                if circuit_breaker is not None:
+                    circuit_breaker.record_success(host)
+                if try_number > 1:
+                    logger.info(f"Try {try_number} succeeded.")
+                return result
+    finally:
+        # A trial request this call let through ends with it, however the call ends
+        if circuit_breaker is not None:
+            circuit_breaker.end_trial(host)
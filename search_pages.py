@@ -0,0 +1,72 @@
+"""
+Search the page archives for pages containing a phrase, e.g., a class name, a venue string or
+a performer. The matching URLs are printed one per line, so they can be saved as a URL list or
+passed to parse_pages_to_events.
+
+Usage:
+    python search_pages.py "Steinway" --venue BIRDLAND --since 2025-01-01
+    python search_pages.py --match 'attributes:"event-title" NOT text:cancelled'
+"""
+
+import argparse
+import datetime as dt
+import logging
+from pathlib import Path
+
+from PageArchive import PageArchive
+from parser_common_code import data_path
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_SUFFIX = "_event_pages.sqlite"
+
+
+def archive_paths(venues: list[str] | None) -> list[Path]:
+    """Return the page archives of the given venues, or of every venue"""
+    if venues:
+        return [Path(data_path(f"{venue.lower()}{ARCHIVE_SUFFIX}")) for venue in venues]
+    return sorted(Path(data_path("")).glob(f"*{ARCHIVE_SUFFIX}"))
+
+
+def timestamp(date: str) -> float:
+    """Seconds since the epoch at the start of a YYYY-MM-DD date"""
+    return dt.datetime.fromisoformat(date).timestamp()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s|%(levelname)s|%(filename)s|%(funcName)s|%(lineno)d|%(message)s",
+    )
+    arg_parser = argparse.ArgumentParser(description="Search the page archives")
+    arg_parser.add_argument("phrase", nargs="?", help="Text the pages must contain")
+    arg_parser.add_argument("--match", help="FTS5 query the pages must match")
+    arg_parser.add_argument(
+        "--venue",
+        action="append",
+        help="Venue to search, e.g., BIRDLAND; may be repeated. All venues if omitted.",
+    )
+    arg_parser.add_argument("--since", help="Earliest fetch date, YYYY-MM-DD")
+    arg_parser.add_argument(
+        "--until",
+        help="Fetch date the pages were fetched before, YYYY-MM-DD (exclusive)",
+    )
+    args = arg_parser.parse_args()
+
+    for archive_path in archive_paths(args.venue):
+        if not archive_path.exists():
+            logger.info(f"No page archive {archive_path}")
+            continue
+        page_archive = PageArchive(str(archive_path))
+        try:
+            urls = page_archive.search(
+                args.phrase,
+                args.match,
+                timestamp(args.since) if args.since else None,
+                timestamp(args.until) if args.until else None,
+            )
+        finally:
+            page_archive.close()
+        logger.info(f"{len(urls)} matching pages in {archive_path.name}")
+        for url in urls:
+            print(url)
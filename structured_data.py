@@ -0,0 +1,114 @@
+import html
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+
+from bs4 import UnicodeDammit
+
+logger = logging.getLogger(__name__)
+
+# One scan of the HTML finds the comments, which are skipped along with any tags in them, the
+# scripts, whose contents are skipped unless they're JSON-LD, and the meta tags
+STRUCTURED_DATA_PATTERN = re.compile(
+    r"(?P<comment><!--.*?-->)"
+    r"|<script\b(?P<script_attributes>[^>]*)>(?P<script>.*?)</script\s*>"
+    r"|<meta\b(?P<meta_attributes>[^>]*)>",
+    re.IGNORECASE | re.DOTALL,
+)
+ATTRIBUTE_PATTERN = re.compile(
+    r"""([^\s=/>]+)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))"""
+)
+
+# Block of JSON-LD wrapped in an HTML comment or a CDATA section
+JSON_LD_WRAPPER_PATTERN = re.compile(
+    r"^\s*(<!--|(//\s*)?<!\[CDATA\[)|(-->|(//\s*)?\]\]>)\s*$"
+)
+
+# A JSON string, and the placeholder it is replaced with while the repairs below are applied
+JSON_STRING_PATTERN = re.compile(r'"(?:[^"\\]|\\.)*"', re.S)
+JSON_STRING_PLACEHOLDER_PATTERN = re.compile(r'"(\d+)"')
+
+# Repairs for faulty JSON-LD, applied in order when a block doesn't decode as it is. They are
+# applied with every string replaced by a placeholder, so they never change a string's contents.
+JSON_LD_REPAIRS = (
+    # Key with no value, e.g., '"offers": "name": ...' or '"offers": }'
+    (re.compile(r'"\d+"\s*:\s*(?="\d+"\s*:|[}\]])'), ""),
+    # Comma left before a closing brace or bracket, including one left by the repair above
+    (re.compile(r",(\s*[}\]])"), r"\1"),
+)
+
+
+@dataclass
+class StructuredData:
+    """A page's JSON-LD blocks and meta tags, read from its HTML without building a soup"""
+
+    markup: str  # The page's HTML, decoded
+    # Decoded blocks in page order, None for a block that can't be decoded
+    json_ld: list = field(default_factory=list)
+    # Content of the first meta tag with each property or name
+    meta: dict[str, str] = field(default_factory=dict)
+
+
+def decode_json_ld(text: str):
+    """
+    Decode a block of JSON-LD, tolerating the faults found in venue pages: control characters such
+    as tabs and newlines inside strings, comment and CDATA wrappers, keys without values and
+    trailing commas. Tabs become spaces.
+    :param text: contents of a JSON-LD script
+    :return: decoded JSON, or None if the block can't be repaired
+    """
+    text = text.replace("\t", " ")
+    try:
+        return json.loads(text, strict=False)
+    except ValueError:
+        pass
+    text = JSON_LD_WRAPPER_PATTERN.sub("", text)
+    strings = []
+
+    def hold_string(match: re.Match) -> str:
+        strings.append(match[0])
+        return f'"{len(strings) - 1}"'
+
+    text = JSON_STRING_PATTERN.sub(hold_string, text)
+    for pattern, replacement in JSON_LD_REPAIRS:
+        text = pattern.sub(replacement, text)
+    text = JSON_STRING_PLACEHOLDER_PATTERN.sub(lambda m: strings[int(m[1])], text)
+    try:
+        return json.loads(text, strict=False)
+    except ValueError as e:
+        logger.info(f"Unable to decode JSON-LD: {e}")
+        return None
+
+
+def extract_structured_data(markup: str | bytes) -> StructuredData:
+    """
+    Read the JSON-LD blocks and meta tags from a page's HTML in one scan, without building a soup
+    :param markup: page HTML; bytes are decoded as BeautifulSoup would
+    :return: the page's structured data
+    """
+    if isinstance(markup, bytes):
+        markup = UnicodeDammit(markup, is_html=True).unicode_markup
+    data = StructuredData(markup)
+    for match in STRUCTURED_DATA_PATTERN.finditer(markup):
+        if match["comment"] is not None:
+            continue
+        if match["script"] is not None:
+            attributes = _tag_attributes(match["script_attributes"])
+            if attributes.get("type", "").lower() == "application/ld+json":
+                data.json_ld.append(decode_json_ld(match["script"]))
+        else:
+            attributes = _tag_attributes(match["meta_attributes"])
+            key = attributes.get("property") or attributes.get("name")
+            if key and "content" in attributes:
+                data.meta.setdefault(key, attributes["content"])
+    return data
+
+
+def _tag_attributes(attributes_text: str) -> dict[str, str]:
+    """Return the attributes of a tag, names lowercased and values unescaped"""
+    attributes = {}
+    for match in ATTRIBUTE_PATTERN.finditer(attributes_text):
+        value = next(v for v in match.group(2, 3, 4) if v is not None)
+        attributes.setdefault(match[1].lower(), html.unescape(value))
+    return attributes
@@ -0,0 +1,64 @@
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from BargemusicParser import BargemusicParser
+from BirdlandParser import BirdlandParser
+from BlueNoteParser import BlueNoteParser
+from CarnegieHallParser import CarnegieHallParser
+from CmsParser import CmsParser
+from EventBriteParser_v2 import EventBriteParser_v2
+from JazzOrgParser import JazzOrgParser
+from JuilliardParser import JuilliardParser
+from KaufmanParser import KaufmanParser
+from LincolnCenterParser import LincolnCenterParser
+from MannesParser import MannesParser
+from MsmParser import MsmParser
+from NationalSawdustParser import NationalSawdustParser
+from NinetySecondsStreetYParser import NinetySecondStreetYParser
+from NjPacParser import NjPacParser
+from NyplParser import NyplParser
+from ScandinaviaHouseParser import ScandinaviaHouseParser
+from SpectrumParser import SpectrumParser
+from SymphonySpaceParser import SymphonySpaceParser
+from ZincParser import ZincParser
+
+
+@dataclass
+class VenueInfo:
+    parser: Any  # Assuming the parser can be any type, adjust as needed
+    num_url_tries: Optional[int] = None
+    seconds_to_wait: Optional[float] = None
+    burst: Optional[int] = None  # Requests allowed back to back before spacing applies
+    fetch_mode: Optional[str] = (
+        None  # FETCH_MODE_HTTP, FETCH_MODE_BROWSER or FETCH_MODE_QT
+    )
+
+
+# Dictionary for venue configurations
+venue_configurations = {
+    "92Y": VenueInfo(NinetySecondStreetYParser()),
+    "BARGEMUSIC": VenueInfo(BargemusicParser()),
+    "BIRDLAND": VenueInfo(BirdlandParser()),
+    "BLUE_NOTE": VenueInfo(BlueNoteParser()),
+    "CARNEGIE": VenueInfo(CarnegieHallParser(), 1, 120.0),
+    "CMS": VenueInfo(CmsParser()),
+    "EVENTBRITE": VenueInfo(EventBriteParser_v2(), None, 1),
+    "JAZZ_ORG": VenueInfo(JazzOrgParser()),
+    "JUILLIARD": VenueInfo(JuilliardParser()),
+    "KAUFMAN": VenueInfo(KaufmanParser()),
+    "LINCOLN_CENTER": VenueInfo(LincolnCenterParser(), None, 20.0),
+    "MANNES": VenueInfo(MannesParser(), 2, 10.0),
+    "MSM": VenueInfo(MsmParser()),
+    "NATIONAL_SAWDUST": VenueInfo(NationalSawdustParser()),
+    "NJPAC": VenueInfo(NjPacParser()),
+    "NYPL": VenueInfo(NyplParser()),
+    "SCANDINAVIA_HOUSE": VenueInfo(ScandinaviaHouseParser()),
+    "SPECTRUM": VenueInfo(SpectrumParser()),
+    "SYMPHONY_SPACE": VenueInfo(SymphonySpaceParser()),
+    "ZINC-JAZZ": VenueInfo(ZincParser()),
+}
+
+
+def page_archive_file_name(venue: str) -> str:
+    """Name of a venue's page archive in the data directory"""
+    return f"{venue.lower()}_event_pages.sqlite"